@@ -127,9 +127,19 @@ def _hologram_send_sms(token: str, device_id: str, body: str) -> bool:
 
 
 def create_app(
-    start_scheduler: bool = True, run_initial_analysis: bool = True
+    start_scheduler: bool = True,
+    run_initial_analysis: bool = True,
+    config: Optional[dict[str, Any]] = None,
+    instance_path: Optional[str] = None,
 ):
-    app = Flask(__name__)
+    """Construit l'application Flask.
+
+    ``config`` permet de surcharger la configuration (ex. la base de
+    données des tests) avant l'initialisation des extensions.
+    ``instance_path`` remplace le dossier ``instance`` qui contient
+    ``trackteur.db``.
+    """
+    app = Flask(__name__, instance_path=instance_path)
     csrf = CSRFProtect()
     csrf.init_app(app)
     reanalysis_progress.update(
@@ -161,6 +171,8 @@ def create_app(
     app.config['REMEMBER_COOKIE_SAMESITE'] = os.environ.get('SESSION_COOKIE_SAMESITE', 'Lax')
     if secure_cookies:
         app.config['PREFERRED_URL_SCHEME'] = 'https'
+    if config:
+        app.config.update(config)
     os.makedirs(app.instance_path, exist_ok=True)
     db.init_app(app)
     login_manager = LoginManager(app)
@@ -282,11 +294,18 @@ def create_app(
                         )
                     )
             if "osmand_id" not in equip_cols:
+                # SQLite refuse ADD COLUMN ... UNIQUE : index unique à part
                 with db.engine.begin() as conn:
                     conn.execute(
                         text(
                             "ALTER TABLE equipment ADD COLUMN osmand_id "
-                            "VARCHAR UNIQUE"
+                            "VARCHAR"
+                        )
+                    )
+                    conn.execute(
+                        text(
+                            "CREATE UNIQUE INDEX IF NOT EXISTS "
+                            "ix_equipment_osmand_id ON equipment (osmand_id)"
                         )
                     )
             if "include_in_analysis" not in equip_cols:
@@ -1516,13 +1535,16 @@ def create_app(
         }
         return {'type': 'FeatureCollection', 'features': [feature]}
 
-    @app.route('/equipment/<int:equipment_id>')
-    @login_required
-    def equipment_detail(equipment_id):
-        from flask import abort
-        eq = db.session.get(Equipment, equipment_id)
-        if not eq:
-            abort(404)
+    def _period_zone_rows(equipment_id: int):
+        """Lignes du tableau des zones pour la période demandée.
+
+        Résout la période à partir de ``request.args`` (par défaut le
+        dernier jour d'activité), agrège les zones de cette période et
+        ajoute une ligne ``nozone:`` pour chaque jour avec traces mais sans
+        zone. Renvoie ``(period, zones, zone_bounds)`` où ``period``
+        contient les paramètres résolus, ``agg_all``/``agg_period`` et les
+        bornes ``filter_start``/``filter_end``.
+        """
         year = request.args.get('year', type=int)
         month = request.args.get('month', type=int)
         day = request.args.get('day', type=int)
@@ -1536,73 +1558,40 @@ def create_app(
             agg_all = zone.get_aggregated_zones(equipment_id)
         else:
             agg_all = []
-        dates = {
-            date.fromisoformat(d)
-            for z in agg_all
-            for d in z.get("dates", [])
-        }
-
-        all_tracks = Track.query.filter_by(equipment_id=equipment_id).all()
-        track_dates = set()
-        for t in all_tracks:
-            current = t.start_time.date()
-            last_day = t.end_time.date()
-            while current <= last_day:
-                track_dates.add(current)
-                current += timedelta(days=1)
-        dates.update(track_dates)
-
-        last_position = (
-            Position.query.filter_by(equipment_id=equipment_id)
-            .order_by(Position.timestamp.desc())
-            .first()
-        )
-        if last_position:
-            dates.add(last_position.timestamp.date())
-
-        # Include days that have raw GPS points (useful when there are no
-        # tracks/zones, e.g., OsmAnd-only data). We query distinct date(ts).
-        try:
-            rows = (
-                db.session.query(db.func.date(Position.timestamp))
-                .filter(Position.equipment_id == equipment_id)
-                .distinct()
-                .all()
-            )
-            for (dt_val,) in rows:
-                # SQLite returns string YYYY-MM-DD; other backends may return date
-                if isinstance(dt_val, date):
-                    dates.add(dt_val)
-                else:
-                    try:
-                        dates.add(date.fromisoformat(str(dt_val)))
-                    except Exception:
-                        pass
-        except Exception:
-            # Fallback: ignore if aggregation fails; not critical
-            pass
 
-        has_tracks = bool(all_tracks)
-
-        if (
-            not show_all
-            and start_date is None
-            and end_date is None
-            and year is None
-            and month is None
-            and day is None
-            and dates
-        ):
-            last = max(dates)
-            start_date = end_date = last
-
-        if show_all or (
+        no_period = (
             start_date is None
             and end_date is None
             and year is None
             and month is None
             and day is None
-        ):
+        )
+        if no_period and not show_all:
+            # Dernier jour avec une zone, une trace ou un point GPS
+            candidates = [
+                date.fromisoformat(d)
+                for z in agg_all
+                for d in z.get("dates", [])
+            ]
+            last_track_end = (
+                db.session.query(db.func.max(Track.end_time))
+                .filter(Track.equipment_id == equipment_id)
+                .scalar()
+            )
+            if last_track_end is not None:
+                candidates.append(last_track_end.date())
+            last_ts = (
+                db.session.query(db.func.max(Position.timestamp))
+                .filter(Position.equipment_id == equipment_id)
+                .scalar()
+            )
+            if last_ts is not None:
+                candidates.append(last_ts.date())
+            if candidates:
+                start_date = end_date = max(candidates)
+                no_period = False
+
+        if show_all or no_period:
             agg_period = agg_all
         else:
             agg_period = zone.get_aggregated_zones(
@@ -1655,19 +1644,6 @@ def create_app(
                 }
             )
 
-        from shapely.ops import unary_union
-        from shapely import wkt
-
-        zone_union = (
-            unary_union([z["geometry"] for z in agg_period])
-            if agg_period
-            else None
-        )
-        bounds = (
-            zone.geom_bounds(zone_union) if zone_union is not None else None
-        )
-
-        track_query = Track.query.filter_by(equipment_id=equipment_id)
         filter_start = start_date
         filter_end = end_date
         if (
@@ -1679,17 +1655,6 @@ def create_app(
         ):
             d = date(year, month, day)
             filter_start = filter_end = d
-        if filter_start is not None:
-            start_dt = datetime.combine(filter_start, datetime.min.time())
-            track_query = track_query.filter(Track.end_time >= start_dt)
-        if filter_end is not None:
-            end_dt = datetime.combine(
-                filter_end + timedelta(days=1), datetime.min.time()
-            )
-            track_query = track_query.filter(Track.start_time < end_dt)
-        tracks = [
-            wkt.loads(t.line_wkt) for t in track_query.all() if t.line_wkt
-        ]
 
         # Compute days that have tracks within the selected period
         track_days_in_period = set()
@@ -1710,6 +1675,143 @@ def create_app(
                 ):
                     track_days_in_period.add(cur)
                 cur += timedelta(days=1)
+
+        # Add explicit rows for days that have tracks but no computed zones
+        # in the selected period (or the auto-selected single day).
+        period_zone_dates = set()
+        for z in agg_period:
+            for dstr in z.get("dates", []):
+                try:
+                    period_zone_dates.add(date.fromisoformat(dstr))
+                except ValueError:
+                    continue
+        missing_days = sorted(track_days_in_period - period_zone_dates)
+        for d in missing_days:
+            zones.append(
+                {
+                    "id": f"nozone:{d.isoformat()}",
+                    "dates": d.isoformat(),
+                    "pass_count": 0,
+                    "surface_ha": 0.0,
+                    "no_zone": True,
+                }
+            )
+
+        period = {
+            "year": year,
+            "month": month,
+            "day": day,
+            "start": start_date,
+            "end": end_date,
+            "show_all": show_all,
+            "filter_start": filter_start,
+            "filter_end": filter_end,
+            "agg_all": agg_all,
+            "agg_period": agg_period,
+        }
+        return period, zones, zone_bounds
+
+    @app.route('/equipment/<int:equipment_id>/zones.json')
+    @login_required
+    def equipment_zones_json(equipment_id):
+        """Lignes du tableau des zones de la page équipement, en JSON."""
+        if not db.session.get(Equipment, equipment_id):
+            abort(404)
+        _, zones, _ = _period_zone_rows(equipment_id)
+        return jsonify(zones)
+
+    @app.route('/equipment/<int:equipment_id>')
+    @login_required
+    def equipment_detail(equipment_id):
+        """Page équipement : carte, tableau des zones et calendrier."""
+        eq = db.session.get(Equipment, equipment_id)
+        if not eq:
+            abort(404)
+        period, zones, zone_bounds = _period_zone_rows(equipment_id)
+        year = period["year"]
+        month = period["month"]
+        day = period["day"]
+        start_date = period["start"]
+        end_date = period["end"]
+        show_all = period["show_all"]
+        filter_start = period["filter_start"]
+        filter_end = period["filter_end"]
+        agg_all = period["agg_all"]
+        agg_period = period["agg_period"]
+
+        dates = {
+            date.fromisoformat(d)
+            for z in agg_all
+            for d in z.get("dates", [])
+        }
+
+        all_tracks = Track.query.filter_by(equipment_id=equipment_id).all()
+        track_dates = set()
+        for t in all_tracks:
+            current = t.start_time.date()
+            last_day = t.end_time.date()
+            while current <= last_day:
+                track_dates.add(current)
+                current += timedelta(days=1)
+        dates.update(track_dates)
+
+        last_position = (
+            Position.query.filter_by(equipment_id=equipment_id)
+            .order_by(Position.timestamp.desc())
+            .first()
+        )
+        if last_position:
+            dates.add(last_position.timestamp.date())
+
+        # Include days that have raw GPS points (useful when there are no
+        # tracks/zones, e.g., OsmAnd-only data). We query distinct date(ts).
+        try:
+            rows = (
+                db.session.query(db.func.date(Position.timestamp))
+                .filter(Position.equipment_id == equipment_id)
+                .distinct()
+                .all()
+            )
+            for (dt_val,) in rows:
+                # SQLite returns string YYYY-MM-DD; other backends may return date
+                if isinstance(dt_val, date):
+                    dates.add(dt_val)
+                else:
+                    try:
+                        dates.add(date.fromisoformat(str(dt_val)))
+                    except Exception:
+                        pass
+        except Exception:
+            # Fallback: ignore if aggregation fails; not critical
+            pass
+
+        has_tracks = bool(all_tracks)
+
+        from shapely.ops import unary_union
+        from shapely import wkt
+
+        zone_union = (
+            unary_union([z["geometry"] for z in agg_period])
+            if agg_period
+            else None
+        )
+        bounds = (
+            zone.geom_bounds(zone_union) if zone_union is not None else None
+        )
+
+        track_query = Track.query.filter_by(equipment_id=equipment_id)
+        if filter_start is not None:
+            start_dt = datetime.combine(filter_start, datetime.min.time())
+            track_query = track_query.filter(Track.end_time >= start_dt)
+        if filter_end is not None:
+            end_dt = datetime.combine(
+                filter_end + timedelta(days=1), datetime.min.time()
+            )
+            track_query = track_query.filter(Track.start_time < end_dt)
+        tracks = [
+            wkt.loads(t.line_wkt) for t in track_query.all() if t.line_wkt
+        ]
+
         if tracks:
             track_union = unary_union(tracks)
             tb = track_union.bounds
@@ -1784,27 +1886,6 @@ def create_app(
 
         has_data = bool(zones or has_tracks or has_last_position or has_points_in_period)
 
-        # Add explicit rows for days that have tracks but no computed zones
-        # in the selected period (or the auto-selected single day).
-        period_zone_dates = set()
-        for z in agg_period:
-            for dstr in z.get("dates", []):
-                try:
-                    period_zone_dates.add(date.fromisoformat(dstr))
-                except Exception:
-                    continue
-        missing_days = sorted(track_days_in_period - period_zone_dates)
-        for d in missing_days:
-            zones.append(
-                {
-                    "id": f"nozone:{d.isoformat()}",
-                    "dates": d.isoformat(),
-                    "pass_count": 0,
-                    "surface_ha": 0.0,
-                    "no_zone": True,
-                }
-            )
-
         date_value = ""
         if start_date and end_date:
             if start_date == end_date:
@@ -2273,6 +2354,10 @@ def create_app(
     def initial_analysis():
         with app.app_context():
             # Ensure DB is usable
+            db.create_all()
+            upgrade_db()
+            # Déjà fait : init_db_once n'a pas à le refaire
+            app._db_init = True  # type: ignore[attr-defined]
             try:
                 Equipment.query.all()
             except Exception:
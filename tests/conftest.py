@@ -1,5 +1,11 @@
 import os
+import shutil
+import sqlite3
+import threading
 import warnings
+from datetime import date, datetime, timedelta
+from functools import partial
+from types import SimpleNamespace
 
 # Silence joblib serial-mode warning emitted in this environment as early as possible
 warnings.filterwarnings(
@@ -15,41 +21,204 @@ warnings.filterwarnings(
     message=r".*Query.get\(\) method is considered legacy.*",
     category=LegacyAPIWarning,
 )
+# Traccar settings expected by the app; tests never reach the server
+os.environ.setdefault("TRACCAR_AUTH_TOKEN", "dummy")
+os.environ.setdefault("TRACCAR_BASE_URL", "http://example.com")
+
 import pytest
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from werkzeug.security import generate_password_hash
+import app as app_module
+import models
 from app import create_app
-from models import db, User, Config, Equipment
+from models import db
+from tests.utils import get_csrf, login, seed_defaults
+import zone
+
+
+@event.listens_for(Engine, "connect")
+def _fast_sqlite_pragmas(dbapi_connection, connection_record):
+    """Skip journaling fsyncs on the SQLite files opened during tests.
+
+    Test databases are throwaway, so durability is traded for speed on
+    every engine, including those tests build with ``create_engine``.
+    """
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=MEMORY")
+    cursor.execute("PRAGMA synchronous=OFF")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _fast_password_hash():
+    """Hash passwords with a single PBKDF2 iteration during tests.
+
+    Werkzeug's default scrypt parameters are deliberately slow. Checking
+    still goes through ``check_password_hash``, which reads the method
+    from the stored hash.
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(
+            models,
+            "generate_password_hash",
+            partial(generate_password_hash, method="pbkdf2:sha256:1"),
+        )
+        yield
+
+
+@pytest.fixture(scope="session")
+def shared_app():
+    """Build the test app and its in-memory schema once per session.
+
+    Returns the app together with a copy of its initial configuration.
+    """
+    app = create_app(
+        start_scheduler=False,
+        run_initial_analysis=False,
+        config={"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"},
+    )
+    with app.app_context():
+        db.create_all()
+    return app, dict(app.config)
 
 
 @pytest.fixture
-def make_app():
-    original = os.environ.get("SKIP_INITIAL_ANALYSIS")
-    os.environ["SKIP_INITIAL_ANALYSIS"] = "1"
+def make_app(shared_app):
+    """Return a callable giving the shared app reset to its seeded state.
+
+    Each call empties every table and reseeds the defaults, restores the
+    configuration the app was built with and resets the reanalysis
+    progress, which is what building a fresh app used to provide.
+    """
+    app, pristine_config = shared_app
 
     def _make_app():
-        app = create_app(start_scheduler=False, run_initial_analysis=False)
-        app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
+        app.config.clear()
+        app.config.update(pristine_config)
+        app_module.reanalysis_progress.update(
+            {"running": False, "current": 0, "total": 0, "equipment": ""}
+        )
+        app.extensions.pop("agg_cache", None)
         with app.app_context():
-            db.drop_all()
-            db.create_all()
-            admin = User(username="admin", is_admin=True)
-            admin.set_password("pass")
-            db.session.add(admin)
-            db.session.add(
-                Config(traccar_url="http://example.com", traccar_token="dummy")
-            )
-            db.session.add(Equipment(id_traccar=1, name="eq"))
-            db.session.commit()
+            # seed_defaults() commits the deletes with the new rows
+            for table in reversed(db.metadata.sorted_tables):
+                db.session.execute(table.delete())
+            app.config["SEED_EQ_ID"] = seed_defaults()
         return app
 
     try:
         yield _make_app
     finally:
-        if original is None:
-            os.environ.pop("SKIP_INITIAL_ANALYSIS", None)
-        else:
-            os.environ["SKIP_INITIAL_ANALYSIS"] = original
+        app.config.clear()
+        app.config.update(pristine_config)
+
+
+@pytest.fixture(scope="session")
+def _session_cookies():
+    """Session cookies of logged-in users, kept for the whole run."""
+    return {}
+
+
+@pytest.fixture
+def admin_client(make_app, _session_cookies):
+    """Client of a freshly reset app, logged in as the seeded admin.
+
+    Only the first test goes through the login form; later ones reuse its
+    session cookie, which stays valid because the shared app keeps its
+    secret key and the reseeded admin gets the same id back.
+    """
+    app = make_app()
+    client = app.test_client()
+    cookie = _session_cookies.get("admin")
+    if cookie is None:
+        login(client)
+        _session_cookies["admin"] = client.get_cookie("session").value
+    else:
+        client.set_cookie("session", cookie)
+    return client
+
+
+@pytest.fixture
+def admin_csrf(admin_client, _session_cookies):
+    """CSRF token valid for the ``admin_client`` session.
+
+    Flask-WTF signs tokens against a value stored in the session, so the
+    token fetched once stays valid for every reuse of the cached cookie.
+    """
+    token = _session_cookies.get("admin_csrf")
+    if token is None:
+        token = get_csrf(admin_client, "/")
+        _session_cookies["admin_csrf"] = token
+    return token
+
+
+@pytest.fixture
+def no_devices(monkeypatch):
+    """Make Traccar report no device so admin pages skip the network."""
+    monkeypatch.setattr(zone, "fetch_devices", lambda: [])
+
+
+@pytest.fixture
+def instant_thread(monkeypatch):
+    """Run ``threading.Thread`` targets synchronously on ``start()``."""
+
+    class InstantThread:
+        def __init__(self, target, args=(), kwargs=None, daemon=None):
+            self.target = target
+            self.args = args
+            self.kwargs = kwargs or {}
+
+        def start(self) -> None:
+            self.target(*self.args, **self.kwargs)
+
+    monkeypatch.setattr(threading, "Thread", InstantThread)
+    return InstantThread
+
+
+@pytest.fixture(scope="session")
+def template_db(tmp_path_factory):
+    """SQLite file with the full schema and default seed, built once."""
+    path = tmp_path_factory.mktemp("template") / "trackteur.db"
+    app = create_app(
+        start_scheduler=False,
+        run_initial_analysis=False,
+        config={"SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}"},
+    )
+    with app.app_context():
+        db.create_all()
+        seed_defaults()
+        db.engine.dispose()
+    return path
+
+
+@pytest.fixture
+def seeded_db_file(template_db, tmp_path):
+    """Private copy of ``template_db`` for a test that needs a DB file."""
+    path = tmp_path / "trackteur.db"
+    shutil.copyfile(template_db, path)
+    return path
+
 
+@pytest.fixture(scope="session")
+def dates():
+    """Reference days shared by seeds and assertions for the whole run.
 
+    Reading the clock once keeps every test on the same day, even when the
+    run crosses midnight.
+    """
+    today = date.today()
+    return SimpleNamespace(
+        today=today,
+        midnight=datetime.combine(today, datetime.min.time()),
+        yesterday=today - timedelta(days=1),
+        nozone_day=today - timedelta(days=2),
+        prev_month=(today.replace(day=1) - timedelta(days=1)).replace(day=1),
+        prev_year=today - timedelta(days=365),
+    )
 
 
 @pytest.fixture
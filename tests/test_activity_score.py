@@ -1,23 +1,14 @@
-import os
-import sys
-from datetime import date, datetime, timedelta, timezone
+from datetime import datetime, timedelta, timezone
 
-ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
-if ROOT_DIR not in sys.path:
-    sys.path.insert(0, ROOT_DIR)
+from models import db, Equipment, DailyZone
+import zone
+from tests.utils import clear_tables, login_as
 
-os.environ.setdefault("TRACCAR_AUTH_TOKEN", "dummy")
-os.environ.setdefault("TRACCAR_BASE_URL", "http://example.com")
 
-from models import db, Equipment, DailyZone  # noqa: E402
-import zone  # noqa: E402
-from tests.utils import login  # noqa: E402
-
-
-def test_index_sorted_by_score(make_app, monkeypatch):
+def test_index_sorted_by_score(make_app, monkeypatch, dates):
     app = make_app()
     with app.app_context():
-        db.session.query(Equipment).delete()
+        clear_tables(Equipment)
         now = datetime.now(timezone.utc).replace(tzinfo=None)
         eq1 = Equipment(
             id_traccar=1,
@@ -38,13 +29,13 @@ def test_index_sorted_by_score(make_app, monkeypatch):
         db.session.add_all([
             DailyZone(
                 equipment_id=eq1.id,
-                date=date.today(),
+                date=dates.today,
                 surface_ha=10.0,
                 polygon_wkt="POLYGON((0 0,1 0,1 1,0 1,0 0))",
             ),
             DailyZone(
                 equipment_id=eq2.id,
-                date=date.today(),
+                date=dates.today,
                 surface_ha=5.0,
                 polygon_wkt="POLYGON((0 0,1 0,1 1,0 1,0 0))",
             ),
@@ -53,7 +44,7 @@ def test_index_sorted_by_score(make_app, monkeypatch):
         ids = {e.name: e.id for e in Equipment.query.all()}
 
     client = app.test_client()
-    login(client)
+    login_as(client)
 
     def fake_rel(equipment_id: int) -> float:
         return 9.0 if equipment_id == ids["T1"] else 4.0
@@ -1,35 +1,19 @@
-import os
-import sys
+from models import Config
+import zone
+from tests.utils import make_legacy_app
 
-ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
-if ROOT_DIR not in sys.path:
-    sys.path.insert(0, ROOT_DIR)
 
-os.environ.setdefault("TRACCAR_AUTH_TOKEN", "dummy")
-os.environ.setdefault("TRACCAR_BASE_URL", "http://example.com")
-
-from app import create_app  # noqa: E402
-from models import Config  # noqa: E402
-import zone  # noqa: E402
-import sqlite3  # noqa: E402
-from pathlib import Path  # noqa: E402
-import threading  # noqa: E402
-from tests.utils import login, get_csrf  # noqa: E402
-
-
-def test_admin_updates_server_url(make_app, monkeypatch):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_admin_updates_server_url(admin_client, admin_csrf, monkeypatch):
+    client = admin_client
+    app = client.application
     devices = [{"id": 1, "name": "eq"}]
     monkeypatch.setattr(zone, "fetch_devices", lambda: devices)
-    token = get_csrf(client, "/admin/traccar")
     resp = client.post(
         "/admin/traccar",
         data={
             "base_url": "http://new.com",
             "token_global": "tok",
-            "csrf_token": token,
+            "csrf_token": admin_csrf,
         },
     )
     assert resp.status_code == 200
@@ -39,15 +23,12 @@ def test_admin_updates_server_url(make_app, monkeypatch):
         assert cfg.traccar_token == "tok"
 
 
-def test_admin_updates_analysis_hour(make_app, monkeypatch):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-    monkeypatch.setattr(zone, "fetch_devices", lambda: [])
-    token = get_csrf(client, "/admin/analysis")
+def test_admin_updates_analysis_hour(admin_client, admin_csrf, no_devices):
+    client = admin_client
+    app = client.application
     resp = client.post(
         "/admin/analysis",
-        data={"analysis_hour": "5", "csrf_token": token},
+        data={"analysis_hour": "5", "csrf_token": admin_csrf},
     )
     assert resp.status_code == 200
     with app.app_context():
@@ -56,22 +37,12 @@ def test_admin_updates_analysis_hour(make_app, monkeypatch):
 
 
 def test_upgrade_db_adds_config_columns():
-    db_path = Path("instance/trackteur.db")
-    if db_path.exists():
-        db_path.unlink()
-    conn = sqlite3.connect(db_path)
-    conn.execute(
+    app = make_legacy_app(
         "CREATE TABLE config (id INTEGER PRIMARY KEY, traccar_url TEXT, "
-        "traccar_token TEXT)"
-    )
-    conn.execute(
+        "traccar_token TEXT)",
         "INSERT INTO config (traccar_url, traccar_token) VALUES "
-        "('http://old', 'tok')"
+        "('http://old', 'tok')",
     )
-    conn.commit()
-    conn.close()
-
-    app = create_app(start_scheduler=False, run_initial_analysis=False)
     client = app.test_client()
     client.get("/setup")
     with app.app_context():
@@ -80,13 +51,10 @@ def test_upgrade_db_adds_config_columns():
         assert cfg.min_surface_ha == 0.1
         assert cfg.alpha == 0.02
         assert cfg.analysis_hour == 2
-    db_path.unlink()
 
 
-def test_admin_handles_fetch_error(make_app, monkeypatch):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_admin_handles_fetch_error(admin_client, monkeypatch):
+    client = admin_client
 
     def fake_fetch_devices():
         raise zone.requests.exceptions.HTTPError("401")
@@ -100,21 +68,18 @@ def test_admin_handles_fetch_error(make_app, monkeypatch):
     )
 
 
-def test_admin_page_has_status_poll(make_app, monkeypatch):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-    monkeypatch.setattr(zone, "fetch_devices", lambda: [])
+def test_admin_page_has_status_poll(admin_client, no_devices):
+    client = admin_client
     resp = client.get("/admin/equipment")
     html = resp.get_data(as_text=True)
     assert "credentials: 'same-origin'" in html
     assert 'id="analysis-banner"' in html
 
 
-def test_reanalyze_saves_params(make_app, monkeypatch):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_reanalyze_saves_params(
+    admin_client, admin_csrf, monkeypatch, instant_thread
+):
+    client = admin_client
     devices = [{"id": 1, "name": "eq"}]
     monkeypatch.setattr(zone, "fetch_devices", lambda: devices)
     called = []
@@ -124,21 +89,9 @@ def test_reanalyze_saves_params(make_app, monkeypatch):
 
     monkeypatch.setattr(zone, "process_equipment", fake_process)
 
-    class InstantThread:
-        def __init__(self, target, args=(), kwargs=None, daemon=None):
-            self.target = target
-            self.args = args
-            self.kwargs = kwargs or {}
-
-        def start(self):
-            self.target(*self.args, **self.kwargs)
-
-    monkeypatch.setattr(threading, "Thread", InstantThread)
-
-    token = get_csrf(client, "/admin/equipment")
     resp = client.post(
         "/reanalyze_all",
-        data={"csrf_token": token},
+        data={"csrf_token": admin_csrf},
     )
     assert resp.status_code == 302
     assert called == [1]
@@ -151,15 +104,16 @@ def test_reanalyze_saves_params(make_app, monkeypatch):
     }
 
 
-def test_admin_accepts_decimal_comma(make_app, monkeypatch):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-    monkeypatch.setattr(zone, "fetch_devices", lambda: [])
-    token = get_csrf(client, "/admin/analysis")
+def test_admin_accepts_decimal_comma(admin_client, admin_csrf, no_devices):
+    client = admin_client
+    app = client.application
     resp = client.post(
         "/admin/analysis",
-        data={"eps_meters": "40,0", "analysis_hour": "3", "csrf_token": token},
+        data={
+            "eps_meters": "40,0",
+            "analysis_hour": "3",
+            "csrf_token": admin_csrf,
+        },
     )
     assert resp.status_code == 200
     with app.app_context():
@@ -168,24 +122,14 @@ def test_admin_accepts_decimal_comma(make_app, monkeypatch):
         assert cfg.analysis_hour == 3
 
 
-def test_reanalyze_accepts_decimal_comma(make_app, monkeypatch):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_reanalyze_accepts_decimal_comma(
+    admin_client, admin_csrf, monkeypatch, instant_thread
+):
+    client = admin_client
+    app = client.application
     devices = [{"id": 1, "name": "eq"}]
     monkeypatch.setattr(zone, "fetch_devices", lambda: devices)
 
-    class InstantThread:
-        def __init__(self, target, args=(), kwargs=None, daemon=None):
-            self.target = target
-            self.args = args
-            self.kwargs = kwargs or {}
-
-        def start(self):
-            self.target(*self.args, **self.kwargs)
-
-    monkeypatch.setattr(threading, "Thread", InstantThread)
-
     # Empêche tout accès réseau en court-circuitant le traitement
     called = []
 
@@ -194,7 +138,6 @@ def test_reanalyze_accepts_decimal_comma(make_app, monkeypatch):
 
     monkeypatch.setattr(zone, "process_equipment", fake_process)
 
-    token = get_csrf(client, "/admin/equipment")
     resp = client.post(
         "/reanalyze_all",
         data={
@@ -202,7 +145,7 @@ def test_reanalyze_accepts_decimal_comma(make_app, monkeypatch):
             "min_surface": "0,3",
             "alpha_shape": "0,07",
             "analysis_hour": "4",
-            "csrf_token": token,
+            "csrf_token": admin_csrf,
         },
     )
     assert resp.status_code in (200, 302)
@@ -3,7 +3,7 @@
 import pytest
 
 from models import Equipment, db
-from tests.utils import login
+from tests.utils import login_as
 
 
 @pytest.mark.usefixtures("base_make_app")
@@ -12,7 +12,7 @@ def test_admin_equipment_add_modal_and_info(make_app):
 
     app = make_app()
     client = app.test_client()
-    login(client)
+    login_as(client)
 
     with app.app_context():
         eq = Equipment(name="OsmDev", osmand_id="osm-1", id_traccar=0)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from tests.utils import get_csrf, login
+from tests.utils import get_csrf, login_as
 
 import app as app_module
 
@@ -8,7 +8,7 @@ import app as app_module
 def test_admin_update_get(make_app, monkeypatch):
     app = make_app()
     client = app.test_client()
-    login(client)
+    login_as(client)
     monkeypatch.setattr(
         app_module, "get_current_version", lambda: "2025.08.0"
     )
@@ -28,7 +28,7 @@ def test_admin_update_get(make_app, monkeypatch):
 def test_admin_update_post(make_app, monkeypatch):
     app = make_app()
     client = app.test_client()
-    login(client)
+    login_as(client)
     versions = iter(["2025.08.0", "2025.08.0", "2025.08.1"])
     monkeypatch.setattr(
         app_module, "get_current_version", lambda: next(versions)
@@ -1,11 +1,4 @@
-import os
-import sys
-
-ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
-if ROOT_DIR not in sys.path:
-    sys.path.insert(0, ROOT_DIR)
-
-from tests.utils import login, get_csrf  # noqa: E402
+from tests.utils import login, get_csrf
 
 
 def test_post_without_csrf_returns_400(make_app):
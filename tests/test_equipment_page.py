@@ -1,382 +1,364 @@
-import os
-import sys
-import json
-import re
 from datetime import date, timedelta, datetime
 from pathlib import Path
+from urllib.parse import urlencode
 
 import pytest
+import soupsieve
+from bs4 import BeautifulSoup
 from pytest import approx
-
-ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
-if ROOT_DIR not in sys.path:
-    sys.path.insert(0, ROOT_DIR)
-
-os.environ.setdefault("TRACCAR_AUTH_TOKEN", "dummy")
-os.environ.setdefault("TRACCAR_BASE_URL", "http://example.com")
-
-from models import db, Equipment, Position, Track, DailyZone  # noqa: E402
-import zone  # noqa: E402
-from tests.utils import login  # noqa: E402
+from sqlalchemy import event, insert
+
+from app import create_app
+from models import db, Equipment, Position, Track, DailyZone
+import zone
+from tests.utils import (
+    assert_all_in,
+    clear_tables,
+    get_js_array,
+    login_as,
+    seed_defaults,
+    seed_positions,
+    slice_between,
+)
+
+
+_ZONE_ROWS = soupsieve.compile("#zones-table tbody tr")
+_OVERLAY_JS = (
+    Path(__file__).resolve().parents[1] / "static" / "js" / "overlay_bundle.js"
+).read_bytes()
+
+
+def _seed_page_data(dates):
+    """Add the zones and positions shared by the equipment page tests."""
+    eq = Equipment.query.first()
+    with db.session.no_autoflush:
+        eq.name = "tractor"
+        today = dates.today
+        yesterday = dates.yesterday
+        prev_month = dates.prev_month
+        prev_year = dates.prev_year
+        dz1 = DailyZone(
+            equipment_id=eq.id,
+            date=today,
+            surface_ha=1.0,
+            polygon_wkt="POLYGON((0 0,1 0,1 1,0 1,0 0))",
+        )
+        dz2 = DailyZone(
+            equipment_id=eq.id,
+            date=today,
+            surface_ha=1.0,
+            polygon_wkt="POLYGON((0 0,1 0,1 1,0 1,0 0))",
+        )
+        dz_yesterday = DailyZone(
+            equipment_id=eq.id,
+            date=yesterday,
+            surface_ha=1.0,
+            polygon_wkt='POLYGON((2 0,3 0,3 1,2 1,2 0))',
+        )
+        dz_prev_month = DailyZone(
+            equipment_id=eq.id,
+            date=prev_month,
+            surface_ha=1.0,
+            polygon_wkt='POLYGON((2 2,3 2,3 3,2 3,2 2))',
+        )
+        dz_prev_year = DailyZone(
+            equipment_id=eq.id,
+            date=prev_year,
+            surface_ha=1.0,
+            polygon_wkt='POLYGON((4 0,5 0,5 1,4 1,4 0))',
+        )
+        db.session.add_all(
+            [dz1, dz2, dz_yesterday, dz_prev_month, dz_prev_year]
+        )
+        nozone_day = dates.nozone_day
+        seed_positions(
+            eq.id,
+            [
+                (0.0, 0.0, today),
+                (0.0, 0.0, today),
+                (0.0, 0.0, today),
+                (0.5, 2.5, yesterday),
+                (2.5, 2.5, prev_month),
+                (4.0, 0.0, prev_year),
+                (6.0, 0.0, nozone_day),
+            ],
+        )
+        db.session.flush()
+    db.session.commit()
 
 
 @pytest.fixture(name="make_app")
-def make_app_fixture(base_make_app):
+def make_app_fixture(base_make_app, dates):
     def _make_app():
         app = base_make_app()
         with app.app_context():
-            eq = Equipment.query.first()
-            eq.name = "tractor"
-            today = date.today()
-            prev_month = (
-                today.replace(day=1) - timedelta(days=1)
-            ).replace(day=1)
-            prev_year = today - timedelta(days=365)
-            yesterday = today - timedelta(days=1)
-            dz1 = DailyZone(
-                equipment_id=eq.id,
-                date=today,
-                surface_ha=1.0,
-                polygon_wkt="POLYGON((0 0,1 0,1 1,0 1,0 0))",
-            )
-            dz2 = DailyZone(
-                equipment_id=eq.id,
-                date=today,
-                surface_ha=1.0,
-                polygon_wkt="POLYGON((0 0,1 0,1 1,0 1,0 0))",
-            )
-            dz_yesterday = DailyZone(
-                equipment_id=eq.id,
-                date=yesterday,
-                surface_ha=1.0,
-                polygon_wkt='POLYGON((2 0,3 0,3 1,2 1,2 0))',
-            )
-            dz_prev_month = DailyZone(
-                equipment_id=eq.id,
-                date=prev_month,
-                surface_ha=1.0,
-                polygon_wkt='POLYGON((2 2,3 2,3 3,2 3,2 2))',
-            )
-            dz_prev_year = DailyZone(
-                equipment_id=eq.id,
-                date=prev_year,
-                surface_ha=1.0,
-                polygon_wkt='POLYGON((4 0,5 0,5 1,4 1,4 0))',
-            )
-            db.session.add_all(
-                [dz1, dz2, dz_yesterday, dz_prev_month, dz_prev_year]
-            )
-            for i in range(3):
-                db.session.add(
-                    Position(
-                        equipment_id=eq.id,
-                        latitude=0.0,
-                        longitude=0.0,
-                        timestamp=today,
-                    )
-                )
-            db.session.add(
-                Position(
-                    equipment_id=eq.id,
-                    latitude=0.5,
-                    longitude=2.5,
-                    timestamp=yesterday,
-                )
-            )
-            db.session.add(
-                Position(
-                    equipment_id=eq.id,
-                    latitude=2.5,
-                    longitude=2.5,
-                    timestamp=prev_month,
-                )
-            )
-            db.session.add(
-                Position(
-                    equipment_id=eq.id,
-                    latitude=4.0,
-                    longitude=0.0,
-                    timestamp=prev_year,
-                )
-            )
-            nozone_day = today - timedelta(days=2)
-            db.session.add(
-                Position(
-                    equipment_id=eq.id,
-                    latitude=6.0,
-                    longitude=0.0,
-                    timestamp=nozone_day,
-                )
-            )
-            db.session.commit()
+            _seed_page_data(dates)
         return app
 
     return _make_app
 
 
-def get_js_array(html: str, var_name: str):
-    match = re.search(rf"const {var_name} = (\[.*?\]);", html)
-    assert match, f"{var_name} not found"
-    return json.loads(match.group(1))
-
-
-def test_header_has_clickable_logo_and_no_buttons(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    from flask import url_for
+@pytest.fixture(scope="module")
+def page_app(dates):
+    """Seeded app shared by the read-only tests of this module.
 
+    It uses its own in-memory database so the per-test apps built by
+    ``make_app`` cannot alter its data.
+    """
+    app = create_app(
+        start_scheduler=False,
+        run_initial_analysis=False,
+        config={"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"},
+    )
     with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    with app.test_request_context():
-        index_url = url_for("index")
+        db.create_all()
+        app.config["SEED_EQ_ID"] = seed_defaults()
+        _seed_page_data(dates)
+    return app
 
-    html = resp.data.decode()
-    assert "Retour" not in html
-    assert "Déconnexion" not in html
 
-    from bs4 import BeautifulSoup
+@pytest.fixture(scope="module")
+def logged_client(page_app):
+    client = page_app.test_client()
+    login_as(client)
+    yield client
 
-    soup = BeautifulSoup(html, "html.parser")
-    logo_link = soup.find("a", href=index_url)
-    assert logo_link is not None
-    assert logo_link.find("img", alt="Trackteur Analyse") is not None
 
-
-def test_equipment_detail_page_loads(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
+@pytest.fixture(scope="module")
+def page_html(page_app, logged_client):
+    """Default equipment page, rendered once for the whole module."""
+    resp = logged_client.get(eq_url(page_app.config["SEED_EQ_ID"]))
     assert resp.status_code == 200
-    html = resp.data.decode()
-    assert "map-container" in html
-    assert "zones-table" in html
-    assert html.find('id="map-container"') < html.find('id="zones-table"')
+    return resp.get_data(as_text=True)
+
+
+@pytest.fixture(scope="module")
+def geojson_cache(page_app, logged_client):
+    """Fetch a GeoJSON endpoint of the shared equipment once per query.
+
+    Takes the same ``resource`` and query parameters as :func:`eq_url` and
+    returns the decoded payload, which is shared between tests and must
+    not be modified.
+    """
+    eqid = page_app.config["SEED_EQ_ID"]
+    cache = {}
+
+    def fetch(resource, **query):
+        url = eq_url(eqid, resource, **query)
+        if url not in cache:
+            resp = logged_client.get(url)
+            assert resp.status_code == 200
+            cache[url] = resp.get_json()
+        return cache[url]
+
+    return fetch
+
+
+def eq_url(eq_id: int, resource: str = "", **query) -> str:
+    """Build the URL of an equipment page or of one of its endpoints.
+
+    A ``day`` date is expanded into the ``year``/``month``/``day``
+    parameters; other dates are sent in ISO format.
+    """
+    url = f"/equipment/{eq_id}"
+    if resource:
+        url += f"/{resource}"
+    d = query.pop("day", None)
+    if d is not None:
+        query.update(year=d.year, month=d.month, day=d.day)
+    if not query:
+        return url
+    params = {
+        k: v.isoformat() if isinstance(v, date) else v
+        for k, v in query.items()
+    }
+    return f"{url}?{urlencode(params)}"
 
 
-def test_equipment_page_has_layer_modal(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_header_has_clickable_logo_and_no_buttons(page_html):
+    assert "Retour" not in page_html
+    assert "Déconnexion" not in page_html
 
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    assert "button.id = 'layer-btn'" in html
-    assert 'id="layer-modal"' in html
-    assert 'name="map-type"' in html
-    assert "google.com/vt/lyrs=y" in html
-    assert "google.com/vt/lyrs=m" in html
+    soup = BeautifulSoup(page_html, "lxml")
+    # The index view is mounted at "/"
+    logo = soup.select_one('a[href="/"] img[alt="Trackteur Analyse"]')
+    assert logo is not None
 
 
-def test_equipment_defaults_to_last_day(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        today = date.today()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    assert f'value="{today.isoformat()}"' in html
+def test_equipment_detail_page_loads(page_html):
+    assert page_html.index('id="map-container"') < page_html.index(
+        'id="zones-table"'
+    )
 
 
-def test_equipment_defaults_to_last_point_day(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+@pytest.mark.parametrize(
+    "needle,present",
+    [
+        ("button.id = 'layer-btn'", True),
+        ('id="layer-modal"', True),
+        ('name="map-type"', True),
+        ("google.com/vt/lyrs=y", True),
+        ("google.com/vt/lyrs=m", True),
+        ('id="open-calendar"', True),
+        ('id="prev-day"', False),
+        ('id="next-day"', False),
+        ('id="date-display"', True),
+        ('data-sheet="equipment"', True),
+        ("data-sheet-content", True),
+        ('data-open="false"', True),
+        ("equipment-sheet.js", True),
+        ("Date(s)", True),
+        ("Passages", True),
+        ("Hectares travaillés", True),
+        ("let fetchToken", True),
+        ("token !== fetchToken", True),
+        ("zonesLoaded", True),
+        ("if (!zonesLoaded)", True),
+        ("zones.geojson", True),
+        ('data-zone-id="', True),
+        ("map.fitBounds(bounds", True),
+        ("const legend = L.control", False),
+        ("button.id = 'legend-btn'", True),
+        ("button.innerHTML = '?'", True),
+    ],
+)
+def test_equipment_page_markup(page_html, needle, present):
+    assert (needle in page_html) is present
+
+
+def test_equipment_defaults_to_last_day(page_html, dates):
+    assert f'value="{dates.today.isoformat()}"' in page_html
+
+
+def test_equipment_defaults_to_last_point_day(admin_client, dates):
+    client = admin_client
+    app = client.application
 
     with app.app_context():
-        eq = Equipment.query.first()
-        today = date.today()
-        yesterday = today - timedelta(days=1)
+        eqid = app.config["SEED_EQ_ID"]
+        today = dates.today
+        yesterday = dates.yesterday
         db.session.add(
             Track(
-                equipment_id=eq.id,
+                equipment_id=eqid,
                 start_time=datetime.combine(yesterday, datetime.min.time()),
                 end_time=datetime.combine(yesterday, datetime.max.time()),
                 line_wkt="LINESTRING(0 0,1 1)",
             )
         )
-        DailyZone.query.filter_by(equipment_id=eq.id, date=today).delete()
-        zone.invalidate_cache(eq.id)
+        DailyZone.query.filter_by(equipment_id=eqid, date=today).delete()
+        zone.invalidate_cache(eqid)
         db.session.commit()
-        resp = client.get(f"/equipment/{eq.id}")
-        zone.invalidate_cache(eq.id)
-    html = resp.data.decode()
-    assert f'value="{today.isoformat()}"' in html
-
-
-def test_multi_pass_zone_included(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        today = date.today()
-        url = (
-            f"/equipment/{eq.id}?year={today.year}&month={today.month}"
-            f"&day={today.day}"
-        )
-        resp = client.get(url)
-    html = resp.data.decode()
-    from bs4 import BeautifulSoup
-
-    soup = BeautifulSoup(html, "html.parser")
-    rows = soup.select("#zones-table tbody tr")
-    assert rows
-    cells = rows[0].find_all("td")
-    assert cells[1].text.strip() == "1"
-
-
-@pytest.mark.xfail(reason="Calendar behavior under revision")
-def test_day_menu_excludes_days_without_zones(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        nz = date.today() - timedelta(days=2)
-        resp = client.get(
-            f"/equipment/{eq.id}?year={nz.year}&month={nz.month}"
-        )
-    html = resp.data.decode()
-    dates = get_js_array(html, "availableDates")
-    assert nz.isoformat() not in dates
-    assert "onDayCreate" in html
-    assert ".flatpickr-day.no-data" in html
-    assert "flatpickr-disabled" in html
-    assert "!availableDates.includes(start)" in html
-    assert "!availableDates.includes(end)" in html
-
-
-def test_equipment_page_has_calendar_control_without_arrows(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    assert 'id="open-calendar"' in html
-    assert 'id="prev-day"' not in html
-    assert 'id="next-day"' not in html
+        resp = client.get(eq_url(eqid))
+        zone.invalidate_cache(eqid)
+    assert f'value="{today.isoformat()}"'.encode() in resp.data
+
+
+def test_multi_pass_zone_included(page_app, logged_client, dates):
+    eqid = page_app.config["SEED_EQ_ID"]
+    today = dates.today
+    url = eq_url(eqid, day=today)
+    resp = logged_client.get(url)
+    html = resp.get_data(as_text=True)
+    soup = BeautifulSoup(html, "lxml")
+    cell = soup.select_one(
+        "#zones-table tbody tr:first-child > td:nth-of-type(2)"
+    )
+    assert cell is not None, "no zone row"
+    assert cell.get_text(strip=True) == "1"
+
+
+@pytest.mark.xfail(reason="Calendar behavior under revision", strict=True)
+def test_day_menu_excludes_days_without_zones(page_app, logged_client, dates):
+    eqid = page_app.config["SEED_EQ_ID"]
+    nz = dates.nozone_day
+    resp = logged_client.get(eq_url(eqid, year=nz.year, month=nz.month))
+    html = resp.get_data(as_text=True)
+    available = get_js_array(resp.data, "availableDates")
+    assert nz.isoformat() not in available
+    assert_all_in(
+        html,
+        [
+            "onDayCreate",
+            ".flatpickr-day.no-data",
+            "flatpickr-disabled",
+            "!availableDates.includes(start)",
+            "!availableDates.includes(end)",
+        ],
+    )
 
 
-@pytest.mark.xfail(reason="Calendar behavior under revision")
-def test_calendar_shows_with_tracks_only(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_calendar_shows_with_tracks_only(admin_client, dates):
+    client = admin_client
+    app = client.application
 
     with app.app_context():
-        eq = Equipment.query.first()
-        DailyZone.query.delete()
-        Track.query.delete()
+        eqid = app.config["SEED_EQ_ID"]
+        clear_tables(DailyZone, Track)
         db.session.commit()
         tr = Track(
-            equipment_id=eq.id,
-            start_time=datetime.combine(
-                date.today(), datetime.min.time()
-            ),
-            end_time=(
-                datetime.combine(date.today(), datetime.min.time())
-                + timedelta(hours=1)
-            ),
+            equipment_id=eqid,
+            start_time=dates.midnight,
+            end_time=dates.midnight + timedelta(hours=1),
             line_wkt="LINESTRING(0 0,1 1)",
         )
         db.session.add(tr)
         db.session.commit()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    dates = get_js_array(html, "availableDates")
-    assert date.today().isoformat() in dates
+    resp = client.get(eq_url(eqid))
+    html = resp.get_data(as_text=True)
+    available = get_js_array(resp.data, "availableDates")
+    assert dates.today.isoformat() in available
     assert 'Aucune donnée disponible' not in html
     assert 'id="date-display"' in html
 
 
-def test_calendar_shows_with_points_only(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_calendar_shows_with_points_only(admin_client, dates):
+    client = admin_client
+    app = client.application
 
     with app.app_context():
-        eq = Equipment.query.first()
+        eqid = app.config["SEED_EQ_ID"]
         # Remove zones and tracks, keep only points on a specific day
-        DailyZone.query.delete()
-        Track.query.delete()
-        Position.query.delete()
-        d = date.today() - timedelta(days=3)
-        db.session.add(
-            Position(
-                equipment_id=eq.id,
-                latitude=1.23,
-                longitude=3.21,
-                timestamp=d,
-            )
-        )
+        clear_tables(DailyZone, Track, Position)
+        d = dates.today - timedelta(days=3)
+        seed_positions(eqid, [(1.23, 3.21, d)])
         db.session.commit()
-        resp = client.get(f"/equipment/{eq.id}")
+    resp = client.get(eq_url(eqid))
 
-    html = resp.data.decode()
+    html = resp.get_data(as_text=True)
     # Date selector should be present and include the point's day
     assert 'id="date-display"' in html
-    dates = get_js_array(html, "availableDates")
-    assert d.isoformat() in dates
+    available = get_js_array(resp.data, "availableDates")
+    assert d.isoformat() in available
     # Calendar button should be enabled
     assert 'id="open-calendar"' in html
-    assert 'disabled' not in html.split('id="open-calendar"', 1)[1].split('>')[0]
+    button = slice_between(html, 'id="open-calendar"', '>')
+    assert 'disabled' not in button
 
 
-@pytest.mark.xfail(reason="Bounds calculation under revision")
-def test_points_only_shows_points_by_default_and_sets_bounds(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_points_only_shows_points_by_default_and_sets_bounds(
+    admin_client, dates
+):
+    client = admin_client
+    app = client.application
 
     with app.app_context():
-        eq = Equipment.query.first()
+        eqid = app.config["SEED_EQ_ID"]
         # Only points, widely separated to create a clear bbox
-        DailyZone.query.delete()
-        Track.query.delete()
-        Position.query.delete()
-        d = date.today()
-        db.session.add_all([
-            Position(
-                equipment_id=eq.id,
-                latitude=10.0,
-                longitude=20.0,
-                timestamp=d,
-            ),
-            Position(
-                equipment_id=eq.id,
-                latitude=11.0,
-                longitude=21.0,
-                timestamp=d,
-            ),
-        ])
+        clear_tables(DailyZone, Track, Position)
+        d = dates.today
+        seed_positions(eqid, [(10.0, 20.0, d), (11.0, 21.0, d)])
         db.session.commit()
-        resp = client.get(f"/equipment/{eq.id}")
+    resp = client.get(eq_url(eqid))
 
-    html = resp.data.decode()
+    html = resp.get_data(as_text=True)
     # Show-points should be checked by default
     assert 'id="show-points"' in html
     idx = html.index('id="show-points"')
     after = html[idx: idx + 200]
     assert 'checked' in after
     # Bounds should cover the two points
-    bounds = get_js_array(html, "initialBounds")
+    bounds = get_js_array(resp.data, "initialBounds")
     west, south, east, north = bounds
     assert west <= 20.0 <= east
     assert west <= 21.0 <= east
@@ -384,20 +366,17 @@ def test_points_only_shows_points_by_default_and_sets_bounds(make_app):
     assert south <= 11.0 <= north
 
 
-@pytest.mark.xfail(reason="Bounds calculation under revision")
-def test_single_day_request_with_tracks(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_single_day_request_with_tracks(admin_client, dates):
+    client = admin_client
+    app = client.application
 
     with app.app_context():
-        eq = Equipment.query.first()
-        DailyZone.query.delete()
-        Track.query.delete()
+        eqid = app.config["SEED_EQ_ID"]
+        clear_tables(DailyZone, Track)
         db.session.commit()
-        d = date.today()
+        d = dates.today
         tr = Track(
-            equipment_id=eq.id,
+            equipment_id=eqid,
             start_time=datetime.combine(d, datetime.min.time()),
             end_time=(
                 datetime.combine(d, datetime.min.time()) + timedelta(hours=1)
@@ -406,116 +385,88 @@ def test_single_day_request_with_tracks(make_app):
         )
         db.session.add(tr)
         db.session.commit()
-        url = f"/equipment/{eq.id}?year={d.year}&month={d.month}&day={d.day}"
-        resp = client.get(url)
+        url = eq_url(eqid, day=d)
+    resp = client.get(url)
     assert resp.status_code == 200
-    html = resp.data.decode()
-    assert f'value="{d.isoformat()}"' in html
+    assert f'value="{d.isoformat()}"'.encode() in resp.data
 
 
-def test_date_selector_outside_info_sheet(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_date_selector_outside_info_sheet(page_html):
+    soup = BeautifulSoup(page_html, "lxml")
+    assert soup.select_one("#date-nav") is not None
+    assert soup.select_one("#info-sheet") is not None
+    assert soup.select_one("#info-sheet #date-nav") is None
 
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    from bs4 import BeautifulSoup
 
-    soup = BeautifulSoup(html, "html.parser")
-    date_nav = soup.find(id="date-nav")
-    assert date_nav is not None
-    info_sheet = soup.find(id="info-sheet")
-    assert info_sheet is not None
-    assert info_sheet.find(id="date-nav") is None
+def test_points_filter_modal_present(page_html):
+    assert "filter-btn" in page_html
+    soup = BeautifulSoup(page_html, "lxml")
+    assert soup.select_one("#info-sheet") is not None
+    assert soup.select_one("#info-sheet #show-points") is None
+    assert soup.select_one("#filter-modal #show-points") is not None
+    assert (
+        soup.select_one("#filter-modal .modal-dialog.modal-dialog-centered")
+        is not None
+    )
 
 
-def test_points_filter_modal_present(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_tracks_and_points_geojson(admin_client, dates):
+    client = admin_client
+    app = client.application
 
     with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    from bs4 import BeautifulSoup
-
-    assert "filter-btn" in html
-    soup = BeautifulSoup(html, "html.parser")
-    info_sheet = soup.find(id="info-sheet")
-    assert info_sheet is not None
-    show_points = soup.find(id="show-points")
-    assert show_points is not None
-    assert info_sheet.find(id="show-points") is None
-    filter_modal = soup.find(id="filter-modal")
-    assert filter_modal is not None
-    assert filter_modal.find(id="show-points") is not None
-    dialog = filter_modal.find(class_="modal-dialog")
-    assert dialog is not None
-    assert "modal-dialog-centered" in dialog.get("class", [])
-
-
-def test_tracks_and_points_geojson(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        Position.query.delete()
+        eqid = app.config["SEED_EQ_ID"]
+        clear_tables(Position)
         db.session.commit()
         track = Track(
-            equipment_id=eq.id,
-            start_time=date.today(),
-            end_time=date.today(),
+            equipment_id=eqid,
+            start_time=dates.today,
+            end_time=dates.today,
             line_wkt="LINESTRING(0 0,1 1)",
         )
         db.session.add(track)
         db.session.flush()
         db.session.add(
             Position(
-                equipment_id=eq.id,
+                equipment_id=eqid,
                 latitude=0,
                 longitude=0,
-                timestamp=date.today(),
+                timestamp=dates.today,
                 track_id=track.id,
             )
         )
         db.session.add(
             Position(
-                equipment_id=eq.id,
+                equipment_id=eqid,
                 latitude=1,
                 longitude=1,
-                timestamp=date.today(),
+                timestamp=dates.today,
                 track_id=track.id,
             )
         )
         db.session.commit()
-        eqid = eq.id
 
-    resp = client.get(f"/equipment/{eqid}/points.geojson")
+    resp = client.get(eq_url(eqid, "points.geojson"))
     data = resp.get_json()
     assert data["features"] == []
-    resp = client.get(f"/equipment/{eqid}/points.geojson?all=1")
+    resp = client.get(eq_url(eqid, "points.geojson", all=1))
     data = resp.get_json()
     assert len(data["features"]) == 2
-    resp = client.get(f"/equipment/{eqid}/tracks.geojson")
+    resp = client.get(eq_url(eqid, "tracks.geojson"))
     data = resp.get_json()
     assert len(data["features"]) == 1
     assert data["features"][0]["geometry"]["type"] == "LineString"
 
 
-def test_tracks_endpoint_does_not_trigger_processing(make_app, monkeypatch):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_tracks_endpoint_does_not_trigger_processing(
+    admin_client, monkeypatch
+):
+    client = admin_client
+    app = client.application
 
     with app.app_context():
-        eq = Equipment.query.first()
-        Track.query.delete()
+        eqid = app.config["SEED_EQ_ID"]
+        clear_tables(Track)
         db.session.commit()
         called = {"count": 0}
 
@@ -523,91 +474,59 @@ def test_tracks_endpoint_does_not_trigger_processing(make_app, monkeypatch):
             called["count"] += 1
 
         monkeypatch.setattr(zone, "process_equipment", fake_process)
-        eqid = eq.id
 
-    resp = client.get(f"/equipment/{eqid}/tracks.geojson")
+    resp = client.get(eq_url(eqid, "tracks.geojson"))
     data = resp.get_json()
     assert called["count"] == 0
     assert data["features"] == []
 
 
-def test_legend_modal_present(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_legend_modal_present(page_html):
+    soup = BeautifulSoup(page_html, "lxml")
+    assert (
+        soup.select_one("#legend-modal .modal-dialog.modal-dialog-centered")
+        is not None
+    )
 
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    assert "const legend = L.control" not in html
-    assert "button.id = 'legend-btn'" in html
-    assert "button.innerHTML = '?'" in html
-    from bs4 import BeautifulSoup
-
-    soup = BeautifulSoup(html, "html.parser")
-    modal = soup.find(id="legend-modal")
-    assert modal is not None
-    dialog = modal.find(class_="modal-dialog")
-    assert dialog is not None
-    assert "modal-dialog-centered" in dialog.get("class", [])
-
-
-def test_zones_geojson_endpoint(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
 
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(
-            f"/equipment/{eq.id}/zones.geojson?bbox=-180,-90,180,90&zoom=12"
-        )
-    assert resp.status_code == 200
-    data = resp.get_json()
+def test_zones_geojson_endpoint(geojson_cache):
+    data = geojson_cache("zones.geojson", bbox="-180,-90,180,90", zoom=12)
     assert data["features"]
     assert "surface_ha" in data["features"][0]["properties"]
     assert "dz_ids" in data["features"][0]["properties"]
 
 
-def test_points_geojson_endpoint(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(
-            f"/equipment/{eq.id}/points.geojson?bbox=-180,-90,180,90&limit=2"
-        )
+def test_points_geojson_endpoint(page_app, logged_client):
+    eqid = page_app.config["SEED_EQ_ID"]
+    resp = logged_client.get(
+        eq_url(eqid, "points.geojson", bbox="-180,-90,180,90", limit=2)
+    )
     assert resp.status_code == 200
     data = resp.get_json()
     assert len(data["features"]) <= 2
 
 
-@pytest.mark.xfail(reason="GeoJSON popup under revision")
-def test_points_geojson_includes_battery_and_popup_code(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+@pytest.mark.xfail(reason="GeoJSON popup under revision", strict=True)
+def test_points_geojson_includes_battery_and_popup_code(admin_client, dates):
+    client = admin_client
+    app = client.application
 
     with app.app_context():
-        eq = Equipment.query.first()
-        Position.query.delete()
+        eqid = app.config["SEED_EQ_ID"]
+        clear_tables(Position)
         db.session.commit()
         p = Position(
-            equipment_id=eq.id,
+            equipment_id=eqid,
             latitude=48.123456,
             longitude=2.654321,
-            timestamp=date.today(),
+            timestamp=dates.today,
             battery_level=87,
         )
         db.session.add(p)
         db.session.commit()
-        eqid = eq.id
 
     # GeoJSON includes battery_level
-    resp = client.get(f"/equipment/{eqid}/points.geojson?all=1")
+    resp = client.get(eq_url(eqid, "points.geojson", all=1))
     data = resp.get_json()
     assert len(data["features"]) == 1
     props = data["features"][0]["properties"]
@@ -615,138 +534,56 @@ def test_points_geojson_includes_battery_and_popup_code(make_app):
     assert props.get("battery_level") == 87
 
     # Page JS binds popups for points
-    resp = client.get(f"/equipment/{eqid}")
-    html = resp.data.decode()
-    assert "pointLayer = L.geoJSON" in html
-    start = html.find("pointLayer = L.geoJSON")
-    snippet = html[start:start+500]
+    resp = client.get(eq_url(eqid))
+    html = resp.get_data(as_text=True)
+    snippet = slice_between(html, "pointLayer = L.geoJSON")[:500]
     assert "onEachFeature" in snippet
     assert "layer.bindPopup" in html
 
 
-def test_equipment_page_contains_highlight_zone(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    assert "function highlightZone" in html
-    start = html.find("function highlightZone")
-    end = html.find("function fetchData")
-    snippet = html[start:end] if end != -1 else html[start:]
+def test_equipment_page_contains_highlight_zone(page_html):
+    snippet = slice_between(
+        page_html, "function highlightZone", "function fetchData"
+    )
     assert "return new Promise" in snippet
     assert "return Promise.resolve()" in snippet
 
 
-def test_equipment_page_contains_highlight_rows(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    assert "function highlightRows" in html
-    start = html.find("function highlightRows")
-    end = html.find("function highlightZone")
-    snippet = html[start:end] if end != -1 else html[start:]
+def test_equipment_page_contains_highlight_rows(page_html):
+    snippet = slice_between(
+        page_html, "function highlightRows", "function highlightZone"
+    )
     assert "highlighted" in snippet
     assert "ids.includes(r.dataset.zoneId)" in snippet
     assert "parseInt" not in snippet
 
 
-def test_map_container_allows_touch(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    start = html.find('<div id="map-container"')
-    end = html.find('>', start)
-    tag = html[start:end]
+def test_map_container_allows_touch(page_html):
+    tag = slice_between(page_html, '<div id="map-container"', '>')
     assert "touch-action: none" not in tag
 
 
-def test_equipment_sheet_has_data_attributes_and_script(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    assert 'data-sheet="equipment"' in html
-    assert 'data-sheet-content' in html
-    assert 'data-open="false"' in html
-    assert 'equipment-sheet.js' in html
-
-
-def test_row_click_fits_bounds_without_zoom_out(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    assert "map.fitBounds(bounds" in html
-    assert "animate: false" in html
-    assert "zoomOut" not in html
-    assert "autoZoomed" not in html
-    assert "panTo(center" not in html
-    assert "fetchData().then" in html
-
-
-def test_row_click_calls_fit_bounds(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    assert "map.fitBounds(bounds" in html
-
-
-def test_row_click_does_not_zoom_out(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    assert "zoomOut" not in html
-    assert "autoZoomed" not in html
-
-
-def test_row_click_calls_highlight_zone_with_popup(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    start = html.find("row.addEventListener('click'")
-    end = html.find("});", start)
-    snippet = html[start:end]
-    assert "async () =>" in snippet
-    assert "const zoneId = row.dataset.zoneId" in snippet
-    assert "openEquipmentSheet()" in snippet
-    assert "if (!zonesLoaded)" in snippet
+def test_row_click_fits_bounds_without_zoom_out(page_html):
+    assert_all_in(
+        page_html,
+        ["map.fitBounds(bounds", "animate: false", "fetchData().then"],
+    )
+    assert "zoomOut" not in page_html
+    assert "autoZoomed" not in page_html
+    assert "panTo(center" not in page_html
+
+
+def test_row_click_calls_highlight_zone_with_popup(page_html):
+    snippet = slice_between(page_html, "row.addEventListener('click'", "});")
+    assert_all_in(
+        snippet,
+        [
+            "async () =>",
+            "const zoneId = row.dataset.zoneId",
+            "openEquipmentSheet()",
+            "if (!zonesLoaded)",
+        ],
+    )
     fd = snippet.index("await fetchData()")
     os = snippet.index("openEquipmentSheet()")
     sz = snippet.index("await selectZone(zoneId)")
@@ -754,228 +591,88 @@ def test_row_click_calls_highlight_zone_with_popup(make_app):
     assert "parseInt" not in snippet
 
 
-def test_select_zone_calls_highlight_and_popup(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    start = html.find("function selectZone")
-    end = html.find("function fetchData")
-    snippet = html[start:end] if end != -1 else html[start:]
+def test_select_zone_calls_highlight_and_popup(page_html):
+    snippet = slice_between(
+        page_html, "function selectZone", "function fetchData"
+    )
     assert "highlightRows([zoneId])" in snippet
     assert "return highlightZone(zoneId, true)" in snippet
     assert "parseInt" not in snippet
 
 
-def test_highlight_zone_offsets_for_open_sheet(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    start = html.find("function highlightZone")
-    end = html.find("function selectZone")
-    snippet = html[start:end] if end != -1 else html[start:]
-    assert "[data-sheet=\"equipment\"]" in snippet
-    assert "getAttribute('data-open') === 'true'" in snippet
-    assert "paddingBottomRight: [0, offset]" in snippet
-    assert "map.panBy([0, offset / 2" in snippet
+def test_highlight_zone_offsets_for_open_sheet(page_html):
+    snippet = slice_between(
+        page_html, "function highlightZone", "function selectZone"
+    )
+    assert_all_in(
+        snippet,
+        [
+            "[data-sheet=\"equipment\"]",
+            "getAttribute('data-open') === 'true'",
+            "paddingBottomRight: [0, offset]",
+            "map.panBy([0, offset / 2",
+        ],
+    )
     assert "map.panBy([0, -offset" not in snippet
 
 
-def test_rebuild_date_layers_uses_properties_id(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    start = html.find("function rebuildDateLayers")
-    end = html.find("function highlightRows")
-    snippet = html[start:end] if end != -1 else html[start:]
+def test_rebuild_date_layers_uses_properties_id(page_html):
+    snippet = slice_between(
+        page_html, "function rebuildDateLayers", "function highlightRows"
+    )
     assert "layer.feature.properties.id" in snippet
     assert "layer.feature.id" in snippet
 
 
-def test_polygon_click_calls_select_zone_without_opening_sheet(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    start = html.find("layer.on('click'")
-    end = html.find("});", start)
-    snippet = html[start:end]
-    assert "feature.properties.id" in snippet
-    assert "feature.id" in snippet
-    assert "String(" in snippet
-    assert "async () =>" in snippet
-    assert "await selectZone(zoneId)" in snippet
+def test_polygon_click_calls_select_zone_without_opening_sheet(page_html):
+    snippet = slice_between(page_html, "layer.on('click'", "});")
+    assert_all_in(
+        snippet,
+        [
+            "feature.properties.id",
+            "feature.id",
+            "String(",
+            "async () =>",
+            "await selectZone(zoneId)",
+        ],
+    )
     assert "openEquipmentSheet()" not in snippet
 
 
-def test_bounds_check_before_zooming(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    assert "getBounds().contains" not in html
-
-
-def test_zone_rows_have_ids(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    assert 'data-zone-id="' in html
-
-
-def test_equipment_table_columns(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    assert "Date(s)" in html
-    assert "Passages" in html
-    assert "Hectares travaillés" in html
-
-
-def test_table_shows_aggregated_pass_count(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    from bs4 import BeautifulSoup
-
-    soup = BeautifulSoup(html, "html.parser")
-    rows = soup.select("#zones-table tbody tr")
-    assert rows
-    cells = rows[0].find_all("td")
-    assert cells[1].text.strip() == "1"
-
-
-def test_fetch_data_uses_token(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_bounds_check_before_zooming(page_html):
+    assert "getBounds().contains" not in page_html
 
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    assert "let fetchToken" in html
-    assert "token !== fetchToken" in html
-
-
-def test_zones_loaded_once_on_page_load(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    assert "zonesLoaded" in html
-    assert "if (!zonesLoaded)" in html
-    assert "zones.geojson" in html
-
-
-def test_equipment_page_has_period_selectors(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-    html = resp.data.decode()
-    assert 'id="date-display"' in html
-    assert 'id="open-calendar"' in html
 
+def test_table_shows_aggregated_pass_count(page_html):
+    soup = BeautifulSoup(page_html, "lxml")
+    cell = soup.select_one(
+        "#zones-table tbody tr:first-child > td:nth-of-type(2)"
+    )
+    assert cell is not None, "no zone row"
+    assert cell.get_text(strip=True) == "1"
 
-def test_zones_geojson_filters_by_day(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
 
-    with app.app_context():
-        eq = Equipment.query.first()
-        today = date.today()
-        resp = client.get(
-            f"/equipment/{eq.id}/zones.geojson?year={today.year}"
-            f"&month={today.month}&day={today.day}&zoom=12"
-        )
-    data = resp.get_json()
+def test_zones_geojson_filters_by_day(geojson_cache, dates):
+    today = dates.today
+    data = geojson_cache("zones.geojson", day=today, zoom=12)
     for feat in data["features"]:
         assert all(d == today.isoformat() for d in feat["properties"]["dates"])
 
 
-def test_zones_geojson_filters_by_range(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        today = date.today()
-        yesterday = today - timedelta(days=1)
-        resp = client.get(
-            f"/equipment/{eq.id}/zones.geojson?start={yesterday.isoformat()}&"
-            f"end={today.isoformat()}&zoom=12",
-        )
-
-    data = resp.get_json()
+def test_zones_geojson_filters_by_range(geojson_cache, dates):
+    today = dates.today
+    yesterday = dates.yesterday
+    data = geojson_cache("zones.geojson", start=yesterday, end=today, zoom=12)
     for feat in data["features"]:
         for d in feat["properties"]["dates"]:
             dd = date.fromisoformat(d)
             assert yesterday <= dd <= today
 
 
-def test_zones_geojson_range_with_gap(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        today = date.today()
-        prev_month = (today.replace(day=1) - timedelta(days=1)).replace(day=1)
-        resp = client.get(
-            f"/equipment/{eq.id}/zones.geojson?start={prev_month.isoformat()}&"
-            f"end={today.isoformat()}&zoom=12",
-        )
-
-    assert resp.status_code == 200
-    data = resp.get_json()
+def test_zones_geojson_range_with_gap(geojson_cache, dates):
+    today = dates.today
+    prev_month = dates.prev_month
+    data = geojson_cache("zones.geojson", start=prev_month, end=today, zoom=12)
     all_dates = []
     for feat in data["features"]:
         all_dates.extend(feat["properties"]["dates"])
@@ -983,40 +680,33 @@ def test_zones_geojson_range_with_gap(make_app):
     assert prev_month.isoformat() in all_dates
 
 
-def test_zones_geojson_uses_global_ids(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        yesterday = date.today() - timedelta(days=1)
-        agg_all = zone.get_aggregated_zones(eq.id)
-        full_idx = next(
-            i for i, z in enumerate(agg_all) if str(yesterday) in z["dates"]
-        )
-        resp = client.get(
-            f"/equipment/{eq.id}/zones.geojson?start={yesterday.isoformat()}&"
-            f"end={yesterday.isoformat()}&zoom=12"
-        )
-    data = resp.get_json()
+def test_zones_geojson_uses_global_ids(page_app, geojson_cache, dates):
+    eqid = page_app.config["SEED_EQ_ID"]
+    yesterday = dates.yesterday
+    with page_app.app_context():
+        agg_all = zone.get_aggregated_zones(eqid)
+    full_idx = next(
+        i for i, z in enumerate(agg_all) if str(yesterday) in z["dates"]
+    )
+    data = geojson_cache(
+        "zones.geojson", start=yesterday, end=yesterday, zoom=12
+    )
     assert data["features"], "no features returned"
     feat = data["features"][0]
     assert feat["id"] == str(full_idx)
     assert feat["properties"]["id"] == str(full_idx)
 
 
-def test_zone_ids_match_between_table_and_geojson(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_zone_ids_match_between_table_and_geojson(admin_client, dates):
+    client = admin_client
+    app = client.application
 
     with app.app_context():
-        eq = Equipment.query.first()
-        yesterday = date.today() - timedelta(days=1)
+        eqid = app.config["SEED_EQ_ID"]
+        yesterday = dates.yesterday
         db.session.add(
             DailyZone(
-                equipment_id=eq.id,
+                equipment_id=eqid,
                 date=yesterday,
                 surface_ha=1.0,
                 polygon_wkt="POLYGON((0 0,1 0,1 1,0 1,0 0))",
@@ -1024,41 +714,34 @@ def test_zone_ids_match_between_table_and_geojson(make_app):
         )
         db.session.commit()
 
-        url = (
-            f"/equipment/{eq.id}?year={yesterday.year}&"
-            f"month={yesterday.month}&day={yesterday.day}"
-        )
-        resp = client.get(url)
-        html = resp.data.decode()
-        from bs4 import BeautifulSoup
-
-        soup = BeautifulSoup(html, "html.parser")
-        rows = soup.select(".zone-row")
-        assert rows, "no zone rows"
-        row_id = rows[0]["data-zone-id"]
-
-        resp = client.get(
-            f"/equipment/{eq.id}/zones.geojson?start={yesterday.isoformat()}&"
-            f"end={yesterday.isoformat()}&zoom=17"
-        )
-        data = resp.get_json()
-        feature_ids = {feat["id"] for feat in data["features"]}
-        assert row_id in feature_ids
+        url = eq_url(eqid, day=yesterday)
+    resp = client.get(url)
+    html = resp.get_data(as_text=True)
+    soup = BeautifulSoup(html, "lxml")
+    rows = soup.select(".zone-row")
+    assert rows, "no zone rows"
+    row_id = rows[0]["data-zone-id"]
+
+    resp = client.get(
+        eq_url(eqid, "zones.geojson", start=yesterday, end=yesterday, zoom=17)
+    )
+    data = resp.get_json()
+    feature_ids = {feat["id"] for feat in data["features"]}
+    assert row_id in feature_ids
 
 
-def test_zone_id_consistency_with_overlaps(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_zone_id_consistency_with_overlaps(admin_client, dates):
+    client = admin_client
+    app = client.application
 
     with app.app_context():
-        eq = Equipment.query.first()
-        earlier = date.today() - timedelta(days=2)
-        later = date.today() - timedelta(days=1)
+        eqid = app.config["SEED_EQ_ID"]
+        earlier = dates.today - timedelta(days=2)
+        later = dates.today - timedelta(days=1)
         # Insert two overlapping zones; the earlier one gets a lower ID
         db.session.add(
             DailyZone(
-                equipment_id=eq.id,
+                equipment_id=eqid,
                 date=earlier,
                 surface_ha=1.0,
                 polygon_wkt="POLYGON((0 0,2 0,2 2,0 2,0 0))",
@@ -1067,7 +750,7 @@ def test_zone_id_consistency_with_overlaps(make_app):
         db.session.commit()
         db.session.add(
             DailyZone(
-                equipment_id=eq.id,
+                equipment_id=eqid,
                 date=later,
                 surface_ha=1.0,
                 polygon_wkt="POLYGON((1 1,3 1,3 3,1 3,1 1))",
@@ -1075,249 +758,150 @@ def test_zone_id_consistency_with_overlaps(make_app):
         )
         db.session.commit()
 
-        url = (
-            f"/equipment/{eq.id}?year={later.year}&month={later.month}"
-            f"&day={later.day}"
-        )
-        resp = client.get(url)
-        from bs4 import BeautifulSoup
-
-        soup = BeautifulSoup(resp.data.decode(), "html.parser")
-        row_id = soup.select_one(".zone-row")["data-zone-id"]
-
-        resp = client.get(
-            f"/equipment/{eq.id}/zones.geojson?start={later.isoformat()}&"
-            f"end={later.isoformat()}&zoom=17"
-        )
-        data = resp.get_json()
-        feature_ids = {feat["id"] for feat in data["features"]}
-        assert row_id in feature_ids
+        url = eq_url(eqid, day=later)
+    resp = client.get(url)
+    soup = BeautifulSoup(resp.get_data(as_text=True), "lxml")
+    row_id = soup.select_one(".zone-row")["data-zone-id"]
 
+    resp = client.get(
+        eq_url(eqid, "zones.geojson", start=later, end=later, zoom=17)
+    )
+    data = resp.get_json()
+    feature_ids = {feat["id"] for feat in data["features"]}
+    assert row_id in feature_ids
 
-def test_points_geojson_filters_by_day(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
 
-    with app.app_context():
-        eq = Equipment.query.first()
-        prev_year = date.today() - timedelta(days=365)
-        resp = client.get(
-            f"/equipment/{eq.id}/points.geojson?"
-            f"year={prev_year.year}&month={prev_year.month}"
-            f"&day={prev_year.day}&limit=100"
-        )
+def test_points_geojson_filters_by_day(page_app, logged_client, dates):
+    eqid = page_app.config["SEED_EQ_ID"]
+    prev_year = dates.prev_year
+    resp = logged_client.get(
+        eq_url(eqid, "points.geojson", day=prev_year, limit=100)
+    )
     data = resp.get_json()
     assert len(data["features"]) == 1
 
 
-def test_points_geojson_range_with_gap(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        today = date.today()
-        prev_year = today - timedelta(days=365)
-        resp = client.get(
-            f"/equipment/{eq.id}/points.geojson?start={prev_year.isoformat()}&"
-            f"end={today.isoformat()}"
-        )
-
+def test_points_geojson_range_with_gap(page_app, logged_client, dates):
+    eqid = page_app.config["SEED_EQ_ID"]
+    today = dates.today
+    prev_year = dates.prev_year
+    resp = logged_client.get(
+        eq_url(eqid, "points.geojson", start=prev_year, end=today)
+    )
     assert resp.status_code == 200
     data = resp.get_json()
     assert data["features"]
 
 
-def test_tracks_geojson_filters_cross_day(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_tracks_geojson_filters_cross_day(admin_client, dates):
+    client = admin_client
+    app = client.application
 
     with app.app_context():
-        eq = Equipment.query.first()
-        Track.query.delete()
+        eqid = app.config["SEED_EQ_ID"]
+        clear_tables(Track)
         db.session.commit()
-        start = (
-            datetime.combine(
-                date.today() - timedelta(days=1), datetime.min.time()
-            )
-            + timedelta(hours=23)
-        )
-        end = (
-            datetime.combine(date.today(), datetime.min.time())
-            + timedelta(hours=1)
-        )
+        start = dates.midnight - timedelta(hours=1)
+        end = dates.midnight + timedelta(hours=1)
         tr = Track(
-            equipment_id=eq.id,
+            equipment_id=eqid,
             start_time=start,
             end_time=end,
             line_wkt="LINESTRING(0 0,1 1)",
         )
         db.session.add(tr)
         db.session.commit()
-        eqid = eq.id
-        today = date.today()
+        today = dates.today
         prev = today - timedelta(days=1)
 
-    resp = client.get(
-        f"/equipment/{eqid}/tracks.geojson?"
-        f"year={today.year}&month={today.month}&day={today.day}"
-    )
+    resp = client.get(eq_url(eqid, "tracks.geojson", day=today))
     data = resp.get_json()
     assert len(data["features"]) == 1
 
-    resp = client.get(
-        f"/equipment/{eqid}/tracks.geojson?"
-        f"year={prev.year}&month={prev.month}&day={prev.day}"
-    )
+    resp = client.get(eq_url(eqid, "tracks.geojson", day=prev))
     data = resp.get_json()
     assert len(data["features"]) == 1
 
 
-def test_tracks_geojson_range_with_gap(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_tracks_geojson_range_with_gap(admin_client, dates):
+    client = admin_client
+    app = client.application
 
     with app.app_context():
-        eq = Equipment.query.first()
-        Track.query.delete()
+        eqid = app.config["SEED_EQ_ID"]
+        clear_tables(Track)
         db.session.commit()
         tr = Track(
-            equipment_id=eq.id,
-            start_time=datetime.combine(date.today(), datetime.min.time()),
-            end_time=(
-                datetime.combine(date.today(), datetime.min.time())
-                + timedelta(hours=1)
-            ),
+            equipment_id=eqid,
+            start_time=dates.midnight,
+            end_time=dates.midnight + timedelta(hours=1),
             line_wkt="LINESTRING(0 0,1 1)",
         )
         db.session.add(tr)
         db.session.commit()
-        today = date.today()
-        prev_month = (today.replace(day=1) - timedelta(days=1)).replace(day=1)
-        url = (
-            f"/equipment/{eq.id}/tracks.geojson?"
-            f"start={prev_month.isoformat()}&end={today.isoformat()}"
-        )
-        resp = client.get(url)
+        today = dates.today
+        prev_month = dates.prev_month
+        url = eq_url(eqid, "tracks.geojson", start=prev_month, end=today)
+    resp = client.get(url)
 
     assert resp.status_code == 200
     data = resp.get_json()
     assert data["features"]
 
 
-def test_equipment_detail_filters_by_period(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        prev_month = (
-            date.today().replace(day=1) - timedelta(days=1)
-        ).replace(day=1)
-        resp = client.get(
-            f"/equipment/{eq.id}?year={prev_month.year}"
-            f"&month={prev_month.month}"
+def test_equipment_detail_filters_by_period(page_app, logged_client, dates):
+    eqid = page_app.config["SEED_EQ_ID"]
+    prev_month = dates.prev_month
+    rows = logged_client.get(
+        eq_url(
+            eqid, "zones.json", year=prev_month.year, month=prev_month.month
         )
-    html = resp.data.decode()
-    from bs4 import BeautifulSoup
-
-    soup = BeautifulSoup(html, "html.parser")
-    rows = soup.select("#zones-table tbody tr")
+    ).get_json()
     assert len(rows) == 1
-    assert prev_month.isoformat() in rows[0].find_all("td")[0].text
-
-
-def test_equipment_detail_filters_by_day(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+    assert prev_month.isoformat() in rows[0]["dates"]
 
-    with app.app_context():
-        eq = Equipment.query.first()
-        today = date.today()
-        resp = client.get(
-            f"/equipment/{eq.id}?year={today.year}&month={today.month}"
-            f"&day={today.day}"
-        )
-    html = resp.data.decode()
-    from bs4 import BeautifulSoup
 
-    soup = BeautifulSoup(html, "html.parser")
-    rows = soup.select("#zones-table tbody tr")
+def test_equipment_detail_filters_by_day(page_app, logged_client, dates):
+    eqid = page_app.config["SEED_EQ_ID"]
+    today = dates.today
+    rows = logged_client.get(eq_url(eqid, "zones.json", day=today)).get_json()
     assert len(rows) == 1
-    assert today.isoformat() in rows[0].find_all("td")[0].text
-
-
-def test_equipment_page_exposes_year_month_day(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        today = date.today()
-        resp = client.get(
-            f"/equipment/{eq.id}?year={today.year}&month={today.month}"
-            f"&day={today.day}"
-        )
-
-    html = resp.data.decode()
-    assert f"const year = {today.year}" in html
-    assert f"const month = {today.month}" in html
-    assert f"const day = {today.day}" in html
-
-
-def test_map_and_table_zones_match_for_day(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        today = date.today()
-        resp_page = client.get(
-            f"/equipment/{eq.id}?year={today.year}&month={today.month}"
-            f"&day={today.day}"
-        )
-        resp_geo = client.get(
-            f"/equipment/{eq.id}/zones.geojson?zoom=17"
-            f"&year={today.year}&month={today.month}&day={today.day}"
-        )
+    assert today.isoformat() in rows[0]["dates"]
+
+
+def test_equipment_page_exposes_year_month_day(page_app, logged_client, dates):
+    eqid = page_app.config["SEED_EQ_ID"]
+    today = dates.today
+    resp = logged_client.get(eq_url(eqid, day=today))
+    assert_all_in(
+        resp.data,
+        [
+            f"const year = {today.year}".encode(),
+            f"const month = {today.month}".encode(),
+            f"const day = {today.day}".encode(),
+        ],
+    )
 
-    html = resp_page.data.decode()
-    from bs4 import BeautifulSoup
 
-    soup = BeautifulSoup(html, "html.parser")
-    table_ids = {
-        row["data-zone-id"]
-        for row in soup.select("#zones-table tbody tr")
-    }
-    data = resp_geo.get_json()
+def test_map_and_table_zones_match_for_day(
+    page_app, logged_client, geojson_cache, dates
+):
+    eqid = page_app.config["SEED_EQ_ID"]
+    today = dates.today
+    rows = logged_client.get(eq_url(eqid, "zones.json", day=today)).get_json()
+    data = geojson_cache("zones.geojson", zoom=17, day=today)
+    table_ids = {str(row["id"]) for row in rows}
     feature_ids = {feat["id"] for feat in data["features"]}
     assert table_ids == feature_ids
 
 
-def test_initial_bounds_reflect_selected_day(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        today = date.today()
-        resp_all = client.get(f"/equipment/{eq.id}?show=all")
-        resp_day = client.get(
-            f"/equipment/{eq.id}?year={today.year}"
-            f"&month={today.month}&day={today.day}"
-        )
-
-    bounds_all = get_js_array(resp_all.data.decode(), "initialBounds")
-    bounds_day = get_js_array(resp_day.data.decode(), "initialBounds")
+def test_initial_bounds_reflect_selected_day(page_app, logged_client, dates):
+    eqid = page_app.config["SEED_EQ_ID"]
+    today = dates.today
+    resp_all = logged_client.get(eq_url(eqid, show="all"))
+    resp_day = logged_client.get(eq_url(eqid, day=today))
+    bounds_all = get_js_array(resp_all.data, "initialBounds")
+    bounds_day = get_js_array(resp_day.data, "initialBounds")
 
     width_all = bounds_all[2] - bounds_all[0]
     width_day = bounds_day[2] - bounds_day[0]
@@ -1327,47 +911,39 @@ def test_initial_bounds_reflect_selected_day(make_app):
     assert bounds_day[1] == approx(bounds_all[1])
 
 
-@pytest.mark.xfail(reason="Bounds calculation under revision")
-def test_single_day_bounds_with_tracks_only(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_single_day_bounds_with_tracks_only(admin_client, dates):
+    client = admin_client
+    app = client.application
 
     with app.app_context():
-        eq = Equipment.query.first()
-        DailyZone.query.delete()
-        Track.query.delete()
+        eqid = app.config["SEED_EQ_ID"]
+        clear_tables(DailyZone, Track)
         db.session.commit()
-        today = date.today()
-        other = today - timedelta(days=1)
-        t1 = Track(
-            equipment_id=eq.id,
-            start_time=datetime.combine(today, datetime.min.time()),
-            end_time=(
-                datetime.combine(today, datetime.min.time())
-                + timedelta(hours=1)
-            ),
-            line_wkt="LINESTRING(0 0,1 1)",
-        )
-        t2 = Track(
-            equipment_id=eq.id,
-            start_time=datetime.combine(other, datetime.min.time()),
-            end_time=(
-                datetime.combine(other, datetime.min.time())
-                + timedelta(hours=1)
-            ),
-            line_wkt="LINESTRING(10 10,11 11)",
+        today = dates.today
+        db.session.execute(
+            insert(Track),
+            [
+                {
+                    "equipment_id": eqid,
+                    "start_time": start,
+                    "end_time": start + timedelta(hours=1),
+                    "line_wkt": line,
+                }
+                for start, line in (
+                    (dates.midnight, "LINESTRING(0 0,1 1)"),
+                    (
+                        dates.midnight - timedelta(days=1),
+                        "LINESTRING(10 10,11 11)",
+                    ),
+                )
+            ],
         )
-        db.session.add_all([t1, t2])
         db.session.commit()
-        resp_all = client.get(f"/equipment/{eq.id}?show=all")
-        resp_day = client.get(
-            f"/equipment/{eq.id}?year={today.year}&month={today.month}"
-            f"&day={today.day}"
-        )
+    resp_all = client.get(eq_url(eqid, show="all"))
+    resp_day = client.get(eq_url(eqid, day=today))
 
-    bounds_all = get_js_array(resp_all.data.decode(), "initialBounds")
-    bounds_day = get_js_array(resp_day.data.decode(), "initialBounds")
+    bounds_all = get_js_array(resp_all.data, "initialBounds")
+    bounds_day = get_js_array(resp_day.data, "initialBounds")
     width_all = bounds_all[2] - bounds_all[0]
     width_day = bounds_day[2] - bounds_day[0]
     assert width_all > width_day * 5
@@ -1375,178 +951,152 @@ def test_single_day_bounds_with_tracks_only(make_app):
     assert bounds_day[1] == approx(0)
 
 
-def test_equipment_detail_filters_by_range(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        today = date.today()
-        yesterday = today - timedelta(days=1)
-        resp = client.get(
-            f"/equipment/{eq.id}?start={yesterday.isoformat()}&"
-            f"end={today.isoformat()}"
-        )
-
-    html = resp.data.decode()
-    from bs4 import BeautifulSoup
-
-    soup = BeautifulSoup(html, "html.parser")
-    rows = soup.select("#zones-table tbody tr")
-    assert len(rows) == 2
-    dates = [r.find_all("td")[0].text for r in rows]
-    assert any(yesterday.isoformat() in d for d in dates)
-    assert any(today.isoformat() in d for d in dates)
-
-
-def test_equipment_detail_range_with_gap(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        today = date.today()
-        prev_month = (today.replace(day=1) - timedelta(days=1)).replace(day=1)
-        resp = client.get(
-            f"/equipment/{eq.id}?start={prev_month.isoformat()}&"
-            f"end={today.isoformat()}"
+@pytest.mark.parametrize(
+    ("start_attr", "n_rows"), [("yesterday", 2), ("prev_month", None)]
+)
+def test_equipment_detail_filters_by_range(
+    page_app, logged_client, dates, start_attr, n_rows
+):
+    eqid = page_app.config["SEED_EQ_ID"]
+    start = getattr(dates, start_attr)
+    today = dates.today
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    with page_app.app_context():
+        engine = db.engine
+        # Force the aggregation query instead of a cached result
+        zone.invalidate_cache(eqid)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        resp = logged_client.get(
+            eq_url(eqid, "zones.json", start=start, end=today)
         )
-
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
     assert resp.status_code == 200
-    html = resp.data.decode()
-    from bs4 import BeautifulSoup
-
-    soup = BeautifulSoup(html, "html.parser")
-    rows = soup.select("#zones-table tbody tr")
-    assert rows
-    dates = [r.find_all("td")[0].text for r in rows]
-    assert any(prev_month.isoformat() in d for d in dates)
-    assert any(today.isoformat() in d for d in dates)
+    rows = resp.get_json()
+    if n_rows is None:
+        assert rows
+    else:
+        assert len(rows) == n_rows
+    row_dates = [r["dates"] for r in rows]
+    assert any(start.isoformat() in d for d in row_dates)
+    assert any(today.isoformat() in d for d in row_dates)
+    # The range must be applied by SQLite, not by filtering in Python
+    assert any(
+        "daily_zone.date >=" in sql and "daily_zone.date <=" in sql
+        for sql in statements
+    )
 
 
-def test_initial_bounds_include_tracks(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+@pytest.mark.parametrize("start_attr", ["prev_month", None])
+def test_zones_json_matches_table_rows(
+    page_app, logged_client, dates, start_attr
+):
+    # Without a period both views default to the last day with activity
+    eqid = page_app.config["SEED_EQ_ID"]
+    period = (
+        {"start": getattr(dates, start_attr), "end": dates.today}
+        if start_attr
+        else {}
+    )
+    html = logged_client.get(eq_url(eqid, **period)).get_data(as_text=True)
+    rows = logged_client.get(eq_url(eqid, "zones.json", **period)).get_json()
+    soup = BeautifulSoup(html, "lxml")
+    table = [
+        [td.get_text(strip=True) for td in tr.find_all("td")]
+        for tr in _ZONE_ROWS.select(soup)
+    ]
+    assert table == [
+        [r["dates"], str(r["pass_count"]), str(round(r["surface_ha"], 2))]
+        for r in rows
+    ]
+
+
+def test_initial_bounds_include_tracks(admin_client, dates):
+    client = admin_client
+    app = client.application
 
     with app.app_context():
-        eq = Equipment.query.first()
+        eqid = app.config["SEED_EQ_ID"]
         track = Track(
-            equipment_id=eq.id,
-            start_time=date.today(),
-            end_time=date.today(),
+            equipment_id=eqid,
+            start_time=dates.today,
+            end_time=dates.today,
             line_wkt="LINESTRING(10 0,11 0)",
         )
         db.session.add(track)
         db.session.commit()
-        resp = client.get(f"/equipment/{eq.id}?show=all")
+    resp = client.get(eq_url(eqid, show="all"))
 
-    bounds = get_js_array(resp.data.decode(), "initialBounds")
+    bounds = get_js_array(resp.data, "initialBounds")
     assert bounds[2] > 9
 
 
-def test_overlay_bundle_guard_present(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_overlay_bundle_guard_present(page_html):
+    assert "js/overlay_bundle.js" in page_html
+    assert b"customElements.get('mce-autosize-textarea')" in _OVERLAY_JS
 
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-
-    html = resp.data.decode()
-    assert "js/overlay_bundle.js" in html
 
-    project_root = Path(__file__).resolve().parents[1]
-    overlay_path = project_root / "static" / "js" / "overlay_bundle.js"
-    content = overlay_path.read_text()
-    assert "customElements.get('mce-autosize-textarea')" in content
+def test_map_click_does_not_open_sheet(page_html):
+    assert page_html.count("openEquipmentSheet()") == 1
 
 
-def test_map_click_does_not_open_sheet(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-
-    html = resp.data.decode()
-    assert html.count("openEquipmentSheet()") == 1
-
-
-def test_calendar_allows_single_day_selection(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    with app.app_context():
-        eq = Equipment.query.first()
-        resp = client.get(f"/equipment/{eq.id}")
-
-    html = resp.data.decode()
-    assert "firstDate = null" in html
-    assert "instance.setDate([current, current], true)" in html
-    assert "picker.clear()" in html
-    assert "clickOpens: false" in html
-    assert "dateInput.addEventListener('click', openPicker)" in html
-
-
-def test_track_and_point_requests_use_day_params(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_calendar_allows_single_day_selection(page_html):
+    assert_all_in(
+        page_html,
+        [
+            "firstDate = null",
+            "instance.setDate([current, current], true)",
+            "picker.clear()",
+            "clickOpens: false",
+            "dateInput.addEventListener('click', openPicker)",
+        ],
+    )
 
-    with app.app_context():
-        eq = Equipment.query.first()
-        today = date.today()
-        resp = client.get(
-            f"/equipment/{eq.id}?year={today.year}&month={today.month}"
-            f"&day={today.day}"
-        )
 
-    html = resp.data.decode()
-    assert "trackParams.set('year', year)" in html
-    assert "pointParams.set('year', year)" in html
+def test_track_and_point_requests_use_day_params(
+    page_app, logged_client, dates
+):
+    eqid = page_app.config["SEED_EQ_ID"]
+    today = dates.today
+    resp = logged_client.get(eq_url(eqid, day=today))
+    assert b"trackParams.set('year', year)" in resp.data
+    assert b"pointParams.set('year', year)" in resp.data
 
 
-def test_overlapping_zones_across_days_show_three_rows(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_overlapping_zones_across_days_show_three_rows(admin_client, dates):
+    client = admin_client
+    app = client.application
 
     with app.app_context():
-        eq = Equipment.query.first()
-        day1 = date.today() + timedelta(days=10)
+        eqid = app.config["SEED_EQ_ID"]
+        day1 = dates.today + timedelta(days=10)
         day2 = day1 + timedelta(days=1)
-        dz_a = DailyZone(
-            equipment_id=eq.id,
-            date=day1,
-            surface_ha=1.0,
-            polygon_wkt="POLYGON((10 0,12 0,12 1,10 1,10 0))",
+        db.session.execute(
+            insert(DailyZone),
+            [
+                {
+                    "equipment_id": eqid,
+                    "date": day1,
+                    "surface_ha": 1.0,
+                    "polygon_wkt": "POLYGON((10 0,12 0,12 1,10 1,10 0))",
+                },
+                {
+                    "equipment_id": eqid,
+                    "date": day2,
+                    "surface_ha": 1.0,
+                    "polygon_wkt": "POLYGON((11 0,13 0,13 1,11 1,11 0))",
+                },
+            ],
         )
-        dz_b = DailyZone(
-            equipment_id=eq.id,
-            date=day2,
-            surface_ha=1.0,
-            polygon_wkt="POLYGON((11 0,13 0,13 1,11 1,11 0))",
-        )
-        db.session.add_all([dz_a, dz_b])
         db.session.commit()
-        zone._AGG_CACHE.clear()
-        resp = client.get(
-            f"/equipment/{eq.id}?start={day1.isoformat()}&"
-            f"end={day2.isoformat()}"
-        )
-
-    html = resp.data.decode()
-    from bs4 import BeautifulSoup
+    rows = client.get(
+        eq_url(eqid, "zones.json", start=day1, end=day2)
+    ).get_json()
 
-    soup = BeautifulSoup(html, "html.parser")
-    rows = soup.select("#zones-table tbody tr")
     assert len(rows) == 3
-    pass_counts = [int(r.find_all("td")[1].text) for r in rows]
-    assert pass_counts == [1, 2, 1]
+    assert [r["pass_count"] for r in rows] == [1, 2, 1]
@@ -3,14 +3,12 @@ from datetime import datetime
 import pytest
 
 from models import db, Equipment, Position
-from tests.utils import login
 
 
 @pytest.mark.usefixtures("base_make_app")
-def test_equipment_status_updates(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_equipment_status_updates(admin_client):
+    client = admin_client
+    app = client.application
 
     with app.app_context():
         eq = Equipment.query.first()
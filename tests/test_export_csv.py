@@ -1,82 +1,79 @@
-import os
-import sys
-from datetime import datetime, date, timedelta
+from datetime import timedelta
 
-ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
-if ROOT_DIR not in sys.path:
-    sys.path.insert(0, ROOT_DIR)
+from sqlalchemy import insert
+from models import db, Equipment, Position
+import zone
 
-os.environ.setdefault("TRACCAR_AUTH_TOKEN", "dummy")
-os.environ.setdefault("TRACCAR_BASE_URL", "http://example.com")
+_CSV_HEADER = [b"latitude", b"longitude", b"timestamp", b"battery_level"]
 
-import pytest  # noqa: E402
-from models import db, Equipment, Position  # noqa: E402
-from tests.utils import login  # noqa: E402
-import zone  # noqa: E402
+# Traccar positions returned by the mocked fetch_positions
+_FAKE_POSITIONS = [
+    {
+        "latitude": 10.0,
+        "longitude": 20.0,
+        "deviceTime": "2023-01-01T00:00:00Z",
+        "attributes": {"batteryLevel": 55},
+    },
+    {
+        "latitude": 11.0,
+        "longitude": 21.0,
+        "deviceTime": "2023-01-01T00:01:00Z",
+        "attributes": {},
+    },
+]
 
 
-def test_export_csv_osmand(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_export_csv_osmand(admin_client, dates):
+    client = admin_client
+    app = client.application
 
     with app.app_context():
         # Create an OsmAnd-backed equipment with stored positions
         eq = Equipment(id_traccar=0, name="osm", osmand_id="dev1")
         db.session.add(eq)
         db.session.flush()
-        t0 = datetime.combine(date.today(), datetime.min.time())
-        db.session.add(Position(equipment_id=eq.id, latitude=1.0, longitude=2.0, timestamp=t0, battery_level=80))
-        db.session.add(Position(equipment_id=eq.id, latitude=1.1, longitude=2.1, timestamp=t0 + timedelta(hours=1)))
+        t0 = dates.midnight
+        db.session.execute(
+            insert(Position),
+            [
+                {"equipment_id": eq.id, "latitude": 1.0, "longitude": 2.0,
+                 "timestamp": t0, "battery_level": 80},
+                {"equipment_id": eq.id, "latitude": 1.1, "longitude": 2.1,
+                 "timestamp": t0 + timedelta(hours=1), "battery_level": None},
+            ],
+        )
         db.session.commit()
         eqid = eq.id
 
-    resp = client.get(f"/equipment/{eqid}/export.csv?start={date.today().isoformat()}&end={date.today().isoformat()}")
+    today = dates.today.isoformat()
+    resp = client.get(f"/equipment/{eqid}/export.csv?start={today}&end={today}")
     assert resp.status_code == 200
     assert resp.mimetype.startswith("text/csv")
-    text = resp.data.decode()
-    lines = [l for l in text.strip().splitlines() if l]
+    lines = [line for line in resp.data.splitlines() if line]
     # header + 2 rows
-    assert lines[0].split(',') == ["latitude", "longitude", "timestamp", "battery_level"]
+    assert lines[0].split(b",") == _CSV_HEADER
     assert len(lines) == 3
-    assert ",80" in lines[1] or lines[1].endswith(",80")
+    assert b",80" in lines[1]
 
 
-def test_export_csv_traccar(make_app, monkeypatch):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_export_csv_traccar(admin_client, monkeypatch, dates):
+    client = admin_client
+    app = client.application
 
     with app.app_context():
         eq = Equipment.query.filter(Equipment.id_traccar != 0).first()
         assert eq is not None
         eqid = eq.id
 
-    # Mock fetch_positions to return a couple of positions with battery
-    def fake_fetch(device_id, frm, to):
-        return [
-            {
-                "latitude": 10.0,
-                "longitude": 20.0,
-                "deviceTime": (datetime.utcnow().isoformat() + "Z"),
-                "attributes": {"batteryLevel": 55},
-            },
-            {
-                "latitude": 11.0,
-                "longitude": 21.0,
-                "deviceTime": (datetime.utcnow().isoformat() + "Z"),
-                "attributes": {},
-            },
-        ]
-
-    monkeypatch.setattr(zone, "fetch_positions", fake_fetch)
+    monkeypatch.setattr(
+        zone, "fetch_positions", lambda *a, **k: _FAKE_POSITIONS
+    )
 
-    today = date.today().isoformat()
+    today = dates.today.isoformat()
     resp = client.get(f"/equipment/{eqid}/export.csv?start={today}&end={today}")
     assert resp.status_code == 200
-    text = resp.data.decode()
-    lines = [l for l in text.strip().splitlines() if l]
-    assert lines[0].split(',') == ["latitude", "longitude", "timestamp", "battery_level"]
+    lines = [line for line in resp.data.splitlines() if line]
+    assert lines[0].split(b",") == _CSV_HEADER
     # header + 2 rows
     assert len(lines) == 3
-    assert ",55" in lines[1] or lines[1].endswith(",55")
+    assert b",55" in lines[1]
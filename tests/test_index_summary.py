@@ -1,20 +1,9 @@
-import os
-import sys
 from datetime import datetime, date
-import threading
 
 import pytest
 
-ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
-if ROOT_DIR not in sys.path:
-    sys.path.insert(0, ROOT_DIR)
-
-os.environ.setdefault("TRACCAR_AUTH_TOKEN", "dummy")
-os.environ.setdefault("TRACCAR_BASE_URL", "http://example.com")
-
-from models import db, Equipment, Position, DailyZone  # noqa: E402
-import zone  # noqa: E402
-from tests.utils import login, get_csrf  # noqa: E402
+from models import db, Equipment, Position, DailyZone
+import zone
 
 
 @pytest.fixture(name="make_app")
@@ -22,10 +11,9 @@ def make_app_fixture(base_make_app):
     return base_make_app
 
 
-def test_index_shows_last_seen_from_positions(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_index_shows_last_seen_from_positions(admin_client):
+    client = admin_client
+    app = client.application
 
     with app.app_context():
         eq = Equipment.query.first()
@@ -56,10 +44,9 @@ def test_index_shows_last_seen_from_positions(make_app):
     assert cells[1].text.strip().startswith("2023-01-01 12:00:00")
 
 
-def test_index_uses_computed_total_hectares(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_index_uses_computed_total_hectares(admin_client):
+    client = admin_client
+    app = client.application
 
     with app.app_context():
         eq = Equipment.query.first()
@@ -99,10 +86,10 @@ def test_index_uses_computed_total_hectares(make_app):
     assert cells[3].text.strip() in {"2.0", "2.00"}
 
 
-def test_reanalysis_updates_index_table(make_app, monkeypatch):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_reanalysis_updates_index_table(
+    admin_client, admin_csrf, monkeypatch, no_devices, instant_thread
+):
+    client = admin_client
 
     def fake_process(eq, since=None):
         eq.total_hectares = 4.0
@@ -111,20 +98,7 @@ def test_reanalysis_updates_index_table(make_app, monkeypatch):
 
     monkeypatch.setattr(zone, "process_equipment", fake_process)
 
-    class InstantThread:
-        def __init__(self, target, args=(), kwargs=None, daemon=None):
-            self.target = target
-            self.args = args
-            self.kwargs = kwargs or {}
-
-        def start(self) -> None:
-            self.target(*self.args, **self.kwargs)
-
-    monkeypatch.setattr(threading, "Thread", InstantThread)
-
-    monkeypatch.setattr(zone, "fetch_devices", lambda: [])
-    token = get_csrf(client, "/admin/equipment")
-    resp = client.post("/reanalyze_all", data={"csrf_token": token})
+    resp = client.post("/reanalyze_all", data={"csrf_token": admin_csrf})
     assert resp.status_code in (200, 302)
 
     resp = client.get("/")
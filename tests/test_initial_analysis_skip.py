@@ -1,50 +1,19 @@
-import importlib
+import app as app_module
 
 
-def test_initial_analysis_skips_when_zones_exist(tmp_path, monkeypatch):
+def test_initial_analysis_skips_when_zones_exist(
+    seeded_db_file, monkeypatch, dates
+):
     """On restart, initial analysis should skip if data exists."""
-    # Prepare an instance folder with a pre-populated DB
-    inst = tmp_path / "inst"
-    inst.mkdir()
-    db_file = inst / "trackteur.db"
+    # Instance folder holding a copy of the seeded template DB
+    inst = seeded_db_file.parent
 
     from sqlalchemy import create_engine, text
-    from datetime import date
 
-    engine = create_engine(f"sqlite:///{db_file}")
+    engine = create_engine(f"sqlite:///{seeded_db_file}")
     with engine.begin() as conn:
-        # Minimal schema to satisfy queries
-        conn.execute(
-            text(
-                "CREATE TABLE equipment (\n"
-                "id INTEGER PRIMARY KEY,\n"
-                "id_traccar INTEGER NOT NULL,\n"
-                "name VARCHAR NOT NULL,\n"
-                "token_api VARCHAR\n"
-                ")"
-            )
-        )
-        conn.execute(
-            text(
-                "CREATE TABLE daily_zone (\n"
-                "id INTEGER PRIMARY KEY,\n"
-                "equipment_id INTEGER NOT NULL,\n"
-                "date DATE,\n"
-                "surface_ha FLOAT,\n"
-                "polygon_wkt TEXT,\n"
-                "pass_count INTEGER DEFAULT 1,\n"
-                "FOREIGN KEY(equipment_id) REFERENCES equipment(id)\n"
-                ")"
-            )
-        )
-        # Insert equipment and one zone for current year
-        conn.execute(
-            text(
-                "INSERT INTO equipment (id, id_traccar, name) VALUES"
-                " (1, 101, 'E1')"
-            )
-        )
-        today = date.today().isoformat()
+        # One zone for the seeded equipment in the current year
+        today = dates.today.isoformat()
         conn.execute(
             text(
                 "INSERT INTO daily_zone (equipment_id, date, surface_ha,"
@@ -53,16 +22,7 @@ def test_initial_analysis_skips_when_zones_exist(tmp_path, monkeypatch):
             ),
             {"d": today},
         )
-
-    # Import app with instance_path redirected to our tmp instance
-    import app as app_module
-    from flask import Flask as RealFlask
-
-    monkeypatch.setattr(
-        app_module,
-        "Flask",
-        lambda name: RealFlask(name, instance_path=str(inst)),
-    )
+    engine.dispose()
 
     # If initial analysis tried to run, this would be called; fail fast
     called = {"count": 0}
@@ -73,10 +33,8 @@ def test_initial_analysis_skips_when_zones_exist(tmp_path, monkeypatch):
 
     monkeypatch.setattr(app_module.zone, "process_equipment", _nope)
 
-    # Reload so our monkeypatch of Flask applies before create_app code runs
-    importlib.reload(app_module).create_app(
-        start_scheduler=False, run_initial_analysis=False
-    )
+    monkeypatch.delenv("SKIP_INITIAL_ANALYSIS", raising=False)
+    app_module.create_app(start_scheduler=False, instance_path=str(inst))
 
     # App created successfully and no processing attempted
     assert called["count"] == 0
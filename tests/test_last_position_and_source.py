@@ -4,14 +4,14 @@ from datetime import datetime
 import pytest
 
 from models import db, Equipment, Position
-from tests.utils import login
+from tests.utils import login_as, seed_positions
 
 
 @pytest.mark.usefixtures("base_make_app")
 def test_index_source_badge_and_last_geojson(make_app):
     app = make_app()
     client = app.test_client()
-    login(client)
+    login_as(client)
 
     with app.app_context():
         # First equipment is created by fixture; ensure it looks like Traccar
@@ -22,15 +22,7 @@ def test_index_source_badge_and_last_geojson(make_app):
         eq.battery_level = 50.0
         # Add a last position
         ts = datetime(2023, 1, 1, 15, 0, 0)
-        db.session.add(
-            Position(
-                equipment_id=eq.id,
-                latitude=1.0,
-                longitude=2.0,
-                timestamp=ts,
-            )
-        )
-        db.session.commit()
+        seed_positions(eq.id, [(1.0, 2.0, ts)])
 
         # Create a direct OsmAnd device
         osm = Equipment(
@@ -42,14 +34,7 @@ def test_index_source_badge_and_last_geojson(make_app):
         db.session.add(osm)
         db.session.flush()  # ensure osm.id is available
         osm_id = osm.id
-        db.session.add(
-            Position(
-                equipment_id=osm_id,
-                latitude=3.0,
-                longitude=4.0,
-                timestamp=ts,
-            )
-        )
+        seed_positions(osm_id, [(3.0, 4.0, ts)])
         db.session.commit()
 
     # Check index badges
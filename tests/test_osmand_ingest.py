@@ -2,22 +2,18 @@ import gzip
 import json
 import logging
 
-import pytest
 from pytest import approx
 
 from models import Equipment, Position, db
-from tests.utils import login, get_csrf
 
 
-@pytest.mark.usefixtures("base_make_app")
-def test_osmand_get_query_updates_position(make_app):
-    app = make_app()
-    app.config["WTF_CSRF_ENABLED"] = False
+def test_osmand_get_query_updates_position(admin_client):
+    client = admin_client
+    app = client.application
     with app.app_context():
         eq = Equipment(id_traccar=0, name="dev", osmand_id="dev123")
         db.session.add(eq)
         db.session.commit()
-        client = app.test_client()
         resp = client.get(
             "/osmand",
             query_string={
@@ -34,14 +30,13 @@ def test_osmand_get_query_updates_position(make_app):
         assert abs(pos.longitude - 2.3) < 1e-9
 
 
-@pytest.mark.usefixtures("base_make_app")
-def test_osmand_json_creates_position(make_app):
-    app = make_app()
+def test_osmand_json_creates_position(admin_client):
+    client = admin_client
+    app = client.application
     with app.app_context():
         eq = Equipment(id_traccar=0, name="osdev", osmand_id="osdev-42")
         db.session.add(eq)
         db.session.commit()
-        client = app.test_client()
         payload = {
             "location": {
                 "timestamp": "2023-01-01T00:00:00.000Z",
@@ -66,14 +61,13 @@ def test_osmand_json_creates_position(make_app):
         assert abs(pos.longitude - 3.0) < 1e-9
 
 
-@pytest.mark.usefixtures("base_make_app")
-def test_osmand_gzip_json_creates_positions(make_app):
-    app = make_app()
+def test_osmand_gzip_json_creates_positions(admin_client):
+    client = admin_client
+    app = client.application
     with app.app_context():
         eq = Equipment(id_traccar=0, name="gz", osmand_id="gz-1")
         db.session.add(eq)
         db.session.commit()
-        client = app.test_client()
         payload = {
             "device_id": "gz-1",
             "locations": [
@@ -93,14 +87,13 @@ def test_osmand_gzip_json_creates_positions(make_app):
         assert cnt == 2
 
 
-@pytest.mark.usefixtures("base_make_app")
-def test_osmand_json_with_battery_updates_equipment(make_app):
-    app = make_app()
+def test_osmand_json_with_battery_updates_equipment(admin_client):
+    client = admin_client
+    app = client.application
     with app.app_context():
         eq = Equipment(id_traccar=0, name="bat", osmand_id="bat-1")
         db.session.add(eq)
         db.session.commit()
-        client = app.test_client()
         payload = {
             "location": {
                 "timestamp": "2024-01-01T00:00:00Z",
@@ -118,14 +111,13 @@ def test_osmand_json_with_battery_updates_equipment(make_app):
         assert eq.battery_level == approx(88)
 
 
-@pytest.mark.usefixtures("base_make_app")
-def test_osmand_json_with_battery_object(make_app):
-    app = make_app()
+def test_osmand_json_with_battery_object(admin_client):
+    client = admin_client
+    app = client.application
     with app.app_context():
         eq = Equipment(id_traccar=0, name="batobj", osmand_id="bat-obj")
         db.session.add(eq)
         db.session.commit()
-        client = app.test_client()
         payload = {
             "location": {
                 "timestamp": "2024-01-01T00:00:00Z",
@@ -143,14 +135,13 @@ def test_osmand_json_with_battery_object(make_app):
         assert eq.battery_level == 44
 
 
-@pytest.mark.usefixtures("base_make_app")
-def test_osmand_json_logs_battery_level(make_app, caplog):
-    app = make_app()
+def test_osmand_json_logs_battery_level(admin_client, caplog):
+    client = admin_client
+    app = client.application
     with app.app_context():
         eq = Equipment(id_traccar=0, name="log", osmand_id="log-1")
         db.session.add(eq)
         db.session.commit()
-        client = app.test_client()
         payload = {
             "location": {
                 "timestamp": "2024-01-01T00:00:00Z",
@@ -172,16 +163,13 @@ def test_osmand_json_logs_battery_level(make_app, caplog):
         )
 
 
-@pytest.mark.usefixtures("base_make_app")
-def test_admin_add_osmand_device(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-    token = get_csrf(client, "/")
+def test_admin_add_osmand_device(admin_client, admin_csrf):
+    client = admin_client
+    app = client.application
     resp = client.post(
         "/osmand/add",
         data={
-            "csrf_token": token,
+            "csrf_token": admin_csrf,
             "osmand_name": "Tracteur OsmAnd",
             "osmand_id": "unit-99",
             "osmand_token": "secret",
@@ -196,14 +184,13 @@ def test_admin_add_osmand_device(make_app):
         assert eq.token_api == "secret"
 
 
-@pytest.mark.usefixtures("base_make_app")
-def test_osmand_json_top_level_battery(make_app):
-    app = make_app()
+def test_osmand_json_top_level_battery(admin_client):
+    client = admin_client
+    app = client.application
     with app.app_context():
         eq = Equipment(id_traccar=0, name="top", osmand_id="top-bat-1")
         db.session.add(eq)
         db.session.commit()
-        client = app.test_client()
         payload = {
             "device_id": "top-bat-1",
             "battery": 42,
@@ -221,29 +208,25 @@ def test_osmand_json_top_level_battery(make_app):
         assert eq.battery_level == 42
 
 
-@pytest.mark.usefixtures("base_make_app")
-def test_unknown_osmand_device_rejected(make_app):
-    app = make_app()
-    client = app.test_client()
-    resp = client.get(
+def test_unknown_osmand_device_rejected(admin_client):
+    resp = admin_client.get(
         "/osmand",
         query_string={"id": "unknown", "lat": "0", "lon": "0"},
     )
     assert resp.status_code == 400
 
 
-@pytest.mark.usefixtures("base_make_app")
-def test_delete_osmand_device(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_delete_osmand_device(admin_client, admin_csrf):
+    client = admin_client
+    app = client.application
     with app.app_context():
         eq = Equipment(id_traccar=0, name="Del", osmand_id="del-1")
         db.session.add(eq)
         db.session.commit()
         eq_id = eq.id
-    token = get_csrf(client, "/")
-    resp = client.post(f"/osmand/{eq_id}/delete", data={"csrf_token": token})
+    resp = client.post(
+        f"/osmand/{eq_id}/delete", data={"csrf_token": admin_csrf}
+    )
     assert resp.status_code == 302
     with app.app_context():
         assert Equipment.query.get(eq_id) is None
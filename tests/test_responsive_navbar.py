@@ -1,19 +1,17 @@
-from tests.utils import login
+from bs4 import BeautifulSoup
 
+_TOGGLER = "button.navbar-toggler"
+_NAV_CONTAINER = "div#navbarNav"
 
-def test_index_navbar_responsive(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-    resp = client.get("/")
+
+def test_index_navbar_responsive(admin_client):
+    resp = admin_client.get("/")
     assert resp.status_code == 200
-    html = resp.data.decode()
-    from bs4 import BeautifulSoup
 
-    soup = BeautifulSoup(html, "html.parser")
-    toggler = soup.select_one("button.navbar-toggler")
+    soup = BeautifulSoup(resp.data, "lxml")
+    toggler = soup.select_one(_TOGGLER)
     assert toggler is not None
     assert toggler.get("data-bs-target") == "#navbarNav"
-    nav_container = soup.select_one("div#navbarNav")
+    nav_container = soup.select_one(_NAV_CONTAINER)
     assert nav_container is not None
     assert "navbar-collapse" in nav_container.get("class", [])
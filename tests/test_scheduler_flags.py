@@ -1,12 +1,6 @@
-import os
-import sys
 import threading
 
-ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
-if ROOT_DIR not in sys.path:
-    sys.path.insert(0, ROOT_DIR)
-
-import app  # noqa: E402
+import app
 
 
 def test_no_scheduler_or_initial_analysis(monkeypatch):
@@ -1,20 +1,31 @@
-import os
-import sys
+import requests  # type: ignore[import-untyped]
+from datetime import datetime, timedelta
+from models import db, Provider, SimCard, Equipment
 
-ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
-if ROOT_DIR not in sys.path:
-    sys.path.insert(0, ROOT_DIR)
 
-import requests  # type: ignore[import-untyped]  # noqa: E402
-from datetime import datetime, timedelta  # noqa: E402
-from models import db, Provider, SimCard, Equipment  # noqa: E402
-from tests.utils import login, get_csrf  # noqa: E402
+# The app counts a SIM as connected for an hour after its last connection
+_CONNECT_TS = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+_CONNECTED_DEVICE_JSON = {
+    "data": {
+        "links": {"cellular": [{"last_connect_time": _CONNECT_TS}]},
+        "lastsession": {"session_end": _CONNECT_TS},
+    }
+}
 
 
-def test_sim_status_and_debug(make_app, monkeypatch):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+class _ConnectedDevice:
+    """Hologram device response for a SIM that just connected."""
+
+    status_code = 200
+    text = "{}"
+
+    def json(self):
+        return _CONNECTED_DEVICE_JSON
+
+
+def test_sim_status_and_debug(admin_client, admin_csrf, monkeypatch):
+    client = admin_client
+    app = client.application
     with app.app_context():
         prov = Provider(name="Hologram", token="t")
         db.session.add(prov)
@@ -29,43 +40,28 @@ def test_sim_status_and_debug(make_app, monkeypatch):
         db.session.commit()
         eqid = eq.id
 
-    class RespGet:
-        status_code = 200
-        text = "{}"
-
-        def json(self):
-            ts = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
-            return {
-                "data": {
-                    "links": {"cellular": [{"last_connect_time": ts}]},
-                    "lastsession": {"session_end": ts},
-                }
-            }
-
     class RespPost:
         ok = True
         status_code = 200
         text = "{}"
-    monkeypatch.setattr(requests, "get", lambda *a, **k: RespGet())
+    monkeypatch.setattr(requests, "get", lambda *a, **k: _ConnectedDevice())
     monkeypatch.setattr(requests, "post", lambda *a, **k: RespPost())
     resp = client.get("/sim/status")
     assert resp.status_code == 200
     data = resp.get_json()
     assert data[0]["connected"] is True
     assert data[0]["last_session"] is not None
-    token = get_csrf(client, "/")
     resp = client.post(
         f"/sim/{eqid}/debug",
-        headers={"X-CSRFToken": token},
+        headers={"X-CSRFToken": admin_csrf},
     )
     assert resp.status_code == 200
     assert resp.get_json()["success"] is True
 
 
-def test_list_provider_sims(make_app, monkeypatch):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_list_provider_sims(admin_client, monkeypatch):
+    client = admin_client
+    app = client.application
     with app.app_context():
         prov = Provider(name="Hologram", token="t")
         db.session.add(prov)
@@ -102,40 +98,25 @@ def test_list_provider_sims(make_app, monkeypatch):
     assert data[0]["value"] == "1:111"
 
 
-def test_associate_sim_creates_record(make_app, monkeypatch):
+def test_associate_sim_creates_record(admin_client, admin_csrf, monkeypatch):
     """Posting to /sim/associate should persist the SIM card."""
-    app = make_app()
-    client = app.test_client()
-    login(client)
+    client = admin_client
+    app = client.application
     with app.app_context():
         prov = Provider(name="Hologram", token="t")
         db.session.add(prov)
-        eq = Equipment.query.first()
         db.session.commit()
         pid = prov.id
-        eqid = eq.id
-    class Resp:
-        status_code = 200
-        text = "{}"
+    eqid = app.config["SEED_EQ_ID"]
 
-        def json(self):
-            ts = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
-            return {
-                "data": {
-                    "links": {"cellular": [{"last_connect_time": ts}]},
-                    "lastsession": {"session_end": ts},
-                }
-            }
-
-    monkeypatch.setattr(requests, "get", lambda *a, **k: Resp())
-    token = get_csrf(client, "/")
+    monkeypatch.setattr(requests, "get", lambda *a, **k: _ConnectedDevice())
     resp = client.post(
         "/sim/associate",
         data={
             "equipment_id": eqid,
             "provider": pid,
             "sim": "123:999",
-            "csrf_token": token,
+            "csrf_token": admin_csrf,
         },
     )
     assert resp.status_code == 302
@@ -145,41 +126,25 @@ def test_associate_sim_creates_record(make_app, monkeypatch):
         assert sim.iccid == "999"
 
 
-def test_associate_sim_shows_feedback(make_app, monkeypatch):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_associate_sim_shows_feedback(admin_client, admin_csrf, monkeypatch):
+    client = admin_client
+    app = client.application
     with app.app_context():
         prov = Provider(name="Hologram", token="t")
         db.session.add(prov)
-        eq = Equipment.query.first()
         db.session.commit()
         pid = prov.id
-        eqid = eq.id
-
-    class Resp:
-        status_code = 200
-        text = "{}"
-
-        def json(self):
-            ts = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
-            return {
-                "data": {
-                    "links": {"cellular": [{"last_connect_time": ts}]},
-                    "lastsession": {"session_end": ts},
-                }
-            }
+    eqid = app.config["SEED_EQ_ID"]
 
-    monkeypatch.setattr(requests, "get", lambda *a, **k: Resp())
+    monkeypatch.setattr(requests, "get", lambda *a, **k: _ConnectedDevice())
 
-    token = get_csrf(client, "/")
     resp = client.post(
         "/sim/associate",
         data={
             "equipment_id": eqid,
             "provider": pid,
             "sim": "123:999",
-            "csrf_token": token,
+            "csrf_token": admin_csrf,
         },
         follow_redirects=True,
     )
@@ -188,10 +153,9 @@ def test_associate_sim_shows_feedback(make_app, monkeypatch):
     assert b"connect\xc3\xa9" in resp.data
 
 
-def test_dissociate_sim_removes_record(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_dissociate_sim_removes_record(admin_client, admin_csrf):
+    client = admin_client
+    app = client.application
     with app.app_context():
         prov = Provider(name="Hologram", token="t")
         db.session.add(prov)
@@ -205,10 +169,9 @@ def test_dissociate_sim_removes_record(make_app):
         db.session.add(sim)
         db.session.commit()
         eqid = eq.id
-    token = get_csrf(client, "/")
     resp = client.post(
         f"/sim/{eqid}/dissociate",
-        headers={"X-CSRFToken": token},
+        headers={"X-CSRFToken": admin_csrf},
     )
     assert resp.status_code == 200
     assert resp.get_json()["success"] is True
@@ -216,10 +179,9 @@ def test_dissociate_sim_removes_record(make_app):
         assert SimCard.query.filter_by(equipment_id=eqid).first() is None
 
 
-def test_sim_status_cache_interval(make_app, monkeypatch):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_sim_status_cache_interval(admin_client, monkeypatch):
+    client = admin_client
+    app = client.application
     with app.app_context():
         prov = Provider(name="Hologram", token="t")
         db.session.add(prov)
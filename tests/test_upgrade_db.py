@@ -1,65 +1,75 @@
-import os
-import sys
-from sqlalchemy import inspect, text
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
 
-ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
-if ROOT_DIR not in sys.path:
-    sys.path.insert(0, ROOT_DIR)
+from models import db
+from tests.utils import column_names, make_legacy_app
 
-from app import create_app  # noqa: E402
-from models import db  # noqa: E402
+LEGACY_PROVIDER_DDL = (
+    "CREATE TABLE provider ("
+    "id INTEGER PRIMARY KEY,"
+    "name VARCHAR,"
+    "type VARCHAR NOT NULL,"
+    "token VARCHAR NOT NULL)"
+)
+LEGACY_EQUIPMENT_DDL = (
+    "CREATE TABLE equipment ("
+    "id INTEGER PRIMARY KEY,"
+    "id_traccar INTEGER,"
+    "name VARCHAR)"
+)
+LEGACY_SIM_CARD_DDL = (
+    "CREATE TABLE sim_card ("
+    "id INTEGER PRIMARY KEY,"
+    "iccid VARCHAR UNIQUE NOT NULL,"
+    "device_id VARCHAR,"
+    "provider_id INTEGER NOT NULL,"
+    "equipment_id INTEGER NOT NULL)"
+)
 
 
-def test_upgrade_adds_orgid(tmp_path):
-    db_path = tmp_path / "legacy.db"
-    # Create legacy table without orgid using sqlite3 before SQLAlchemy connects
-    import sqlite3
-
-    conn = sqlite3.connect(db_path)
-    conn.execute(
-        "CREATE TABLE provider ("
-        "id INTEGER PRIMARY KEY,"
-        "name VARCHAR,"
-        "type VARCHAR NOT NULL,"
-        "token VARCHAR NOT NULL)"
-    )
-    conn.commit()
-    conn.close()
-
-    app = create_app(start_scheduler=False, run_initial_analysis=False)
-    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
+def test_upgrade_adds_orgid():
+    # Create legacy table without orgid before the first request
+    app = make_legacy_app(LEGACY_PROVIDER_DDL)
     with app.test_client() as client:
         client.get("/setup")
     with app.app_context():
-        inspector = inspect(db.engine)
-    cols = [c["name"] for c in inspector.get_columns("provider")]
-    assert "orgid" in cols
+        assert "orgid" in column_names("provider")
 
 
-def test_upgrade_adds_sim_columns(tmp_path):
-    db_path = tmp_path / "legacy.db"
-    import sqlite3
-
-    conn = sqlite3.connect(db_path)
-    conn.execute(
-        "CREATE TABLE provider (id INTEGER PRIMARY KEY, name VARCHAR, type VARCHAR NOT NULL, token VARCHAR NOT NULL)"
-    )
-    conn.execute(
-        "CREATE TABLE equipment (id INTEGER PRIMARY KEY, id_traccar INTEGER, name VARCHAR)"
-    )
-    conn.execute(
-        "CREATE TABLE sim_card (id INTEGER PRIMARY KEY, iccid VARCHAR UNIQUE NOT NULL, device_id VARCHAR, provider_id INTEGER NOT NULL, equipment_id INTEGER NOT NULL)"
+def test_upgrade_adds_sim_columns():
+    app = make_legacy_app(
+        LEGACY_PROVIDER_DDL,
+        LEGACY_EQUIPMENT_DDL,
+        LEGACY_SIM_CARD_DDL,
     )
-    conn.commit()
-    conn.close()
-
-    app = create_app(start_scheduler=False, run_initial_analysis=False)
-    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{db_path}"
     with app.test_client() as client:
         client.get("/setup")
     with app.app_context():
-        inspector = inspect(db.engine)
-        cols = [c["name"] for c in inspector.get_columns("sim_card")]
+        cols = column_names("sim_card")
         assert "connected" in cols
         assert "last_session" in cols
         assert "status_checked" in cols
+
+
+def test_upgrade_adds_unique_osmand_id():
+    app = make_legacy_app(LEGACY_EQUIPMENT_DDL)
+    with app.test_client() as client:
+        client.get("/setup")
+    with app.app_context():
+        assert "osmand_id" in column_names("equipment")
+        indexes = {
+            row[1]: row[2]
+            for row in db.session.execute(
+                text('PRAGMA index_list("equipment")')
+            )
+        }
+        assert indexes.get("ix_equipment_osmand_id") == 1
+        insert = text(
+            "INSERT INTO equipment (id_traccar, name, osmand_id) "
+            "VALUES (0, :name, 'dup')"
+        )
+        db.session.execute(insert, {"name": "a"})
+        with pytest.raises(IntegrityError):
+            db.session.execute(insert, {"name": "b"})
+        db.session.rollback()
@@ -1,20 +1,15 @@
-import os
-import sys
+import pytest
 
-ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
-if ROOT_DIR not in sys.path:
-    sys.path.insert(0, ROOT_DIR)
+import app as app_module
+from models import db, User
+import zone
+import threading
+from tests.utils import login_as, get_csrf
 
-from models import db, User  # noqa: E402
-import zone  # noqa: E402
-import threading  # noqa: E402
-from tests.utils import login, get_csrf  # noqa: E402
 
-os.environ.setdefault("TRACCAR_AUTH_TOKEN", "dummy")
-os.environ.setdefault("TRACCAR_BASE_URL", "http://example.com")
-
-
-def test_non_admin_cannot_access_users(make_app):
+@pytest.fixture
+def reader_client(make_app):
+    """Client logged in as a user without admin rights."""
     app = make_app()
     with app.app_context():
         u = User(username="reader", is_admin=False)
@@ -22,29 +17,30 @@ def test_non_admin_cannot_access_users(make_app):
         db.session.add(u)
         db.session.commit()
     client = app.test_client()
-    login(client, "reader", "pwd")
-    resp = client.get("/users")
-    assert resp.status_code == 302
-
-
-def test_non_admin_cannot_access_admin_page(make_app):
-    app = make_app()
-    with app.app_context():
-        u = User(username="reader", is_admin=False)
-        u.set_password("pwd")
-        db.session.add(u)
-        db.session.commit()
-    client = app.test_client()
-    login(client, "reader", "pwd")
-    resp = client.get("/admin/equipment")
-    assert resp.status_code == 302
-
-
-def test_admin_add_and_delete_user(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-    token = get_csrf(client, "/users")
+    login_as(client, "reader")
+    return client
+
+
+@pytest.mark.parametrize(
+    "method,path,status",
+    [
+        ("get", "/users", 302),
+        ("get", "/admin/equipment", 302),
+        ("post", "/reanalyze_all", 302),
+        ("get", "/analysis_status", 403),
+    ],
+)
+def test_non_admin_denied(reader_client, method, path, status):
+    kwargs = {}
+    if method == "post":
+        kwargs["data"] = {"csrf_token": get_csrf(reader_client, "/login")}
+    resp = getattr(reader_client, method)(path, **kwargs)
+    assert resp.status_code == status
+
+
+def test_admin_add_and_delete_user(admin_client, admin_csrf):
+    client = admin_client
+    app = client.application
     resp = client.post(
         "/users",
         data={
@@ -52,7 +48,7 @@ def test_admin_add_and_delete_user(make_app):
             "username": "bob",
             "password": "secret",
             "role": "read",
-            "csrf_token": token,
+            "csrf_token": admin_csrf,
         },
     )
     assert resp.status_code == 200
@@ -60,33 +56,34 @@ def test_admin_add_and_delete_user(make_app):
         user = User.query.filter_by(username="bob").first()
         assert user is not None
         uid = user.id
-    token = get_csrf(client, "/users")
     client.post(
         "/users",
-        data={"action": "delete", "user_id": str(uid), "csrf_token": token},
+        data={
+            "action": "delete",
+            "user_id": str(uid),
+            "csrf_token": admin_csrf,
+        },
     )
     with app.app_context():
         assert User.query.filter_by(username="bob").first() is None
 
 
-def test_password_reset(make_app):
-    app = make_app()
+def test_password_reset(admin_client, admin_csrf):
+    app = admin_client.application
     with app.app_context():
         u = User(username="temp", is_admin=False)
         u.set_password("old")
         db.session.add(u)
         db.session.commit()
         uid = u.id
-    client = app.test_client()
-    login(client)
-    token = get_csrf(client, "/users")
+    client = admin_client
     client.post(
         "/users",
         data={
             "action": "reset",
             "user_id": str(uid),
             "password": "new",
-            "csrf_token": token,
+            "csrf_token": admin_csrf,
         },
     )
     with app.app_context():
@@ -94,24 +91,10 @@ def test_password_reset(make_app):
         assert user.check_password("new")
 
 
-def test_non_admin_cannot_reanalyze(make_app):
-    app = make_app()
-    with app.app_context():
-        u = User(username="reader", is_admin=False)
-        u.set_password("pwd")
-        db.session.add(u)
-        db.session.commit()
-    client = app.test_client()
-    login(client, "reader", "pwd")
-    token = get_csrf(client, "/login")
-    resp = client.post("/reanalyze_all", data={"csrf_token": token})
-    assert resp.status_code == 302
-
-
-def test_admin_can_trigger_reanalyze(make_app, monkeypatch):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_admin_can_trigger_reanalyze(
+    admin_client, admin_csrf, monkeypatch, no_devices, instant_thread
+):
+    client = admin_client
 
     called = []
 
@@ -119,25 +102,12 @@ def test_admin_can_trigger_reanalyze(make_app, monkeypatch):
         called.append(eq.id_traccar)
 
     monkeypatch.setattr(zone, "process_equipment", fake_process)
-    monkeypatch.setattr(zone, "fetch_devices", lambda: [])
-
-    class InstantThread:
-        def __init__(self, target, args=(), kwargs=None, daemon=None):
-            self.target = target
-            self.args = args
-            self.kwargs = kwargs or {}
-
-        def start(self):
-            self.target(*self.args, **self.kwargs)
-
-    monkeypatch.setattr(threading, "Thread", InstantThread)
 
-    token = get_csrf(client, "/admin/equipment")
-    resp = client.post("/reanalyze_all", data={"csrf_token": token})
+    resp = client.post("/reanalyze_all", data={"csrf_token": admin_csrf})
     assert resp.status_code == 302
     assert called == [1]
-    status = client.get("/analysis_status")
-    assert status.json == {
+    # /analysis_status serves this dict, see test_analysis_status_initial
+    assert app_module.reanalysis_progress == {
         "running": False,
         "current": 1,
         "total": 1,
@@ -145,60 +115,8 @@ def test_admin_can_trigger_reanalyze(make_app, monkeypatch):
     }
 
 
-def test_admin_can_reanalyze_via_post(make_app, monkeypatch):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-
-    called = []
-
-    def fake_process(eq, since=None):
-        called.append(eq.id_traccar)
-
-    monkeypatch.setattr(zone, "process_equipment", fake_process)
-
-    class InstantThread:
-        def __init__(self, target, args=(), kwargs=None, daemon=None):
-            self.target = target
-            self.args = args
-            self.kwargs = kwargs or {}
-
-        def start(self):
-            self.target(*self.args, **self.kwargs)
-
-    monkeypatch.setattr(threading, "Thread", InstantThread)
-
-    monkeypatch.setattr(zone, "fetch_devices", lambda: [])
-    token = get_csrf(client, "/admin/equipment")
-    resp = client.post("/reanalyze_all", data={"csrf_token": token})
-    assert resp.status_code == 302
-    assert called == [1]
-    status = client.get("/analysis_status")
-    assert status.json == {
-        "running": False,
-        "current": 1,
-        "total": 1,
-        "equipment": "",
-    }
-
-
-def test_analysis_status_requires_admin(make_app, monkeypatch):
-    app = make_app()
-    with app.app_context():
-        u = User(username="reader", is_admin=False)
-        u.set_password("pwd")
-        db.session.add(u)
-        db.session.commit()
-    client = app.test_client()
-    login(client, "reader", "pwd")
-    resp = client.get("/analysis_status")
-    assert resp.status_code == 403
-
-
-def test_analysis_status_initial(make_app, monkeypatch):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_analysis_status_initial(admin_client, monkeypatch):
+    client = admin_client
     resp = client.get("/analysis_status")
     assert resp.json == {
         "running": False,
@@ -208,10 +126,10 @@ def test_analysis_status_initial(make_app, monkeypatch):
     }
 
 
-def test_analysis_status_reports_equipment(make_app, monkeypatch):
-    app = make_app()
-    client = app.test_client()
-    login(client)
+def test_analysis_status_reports_equipment(
+    admin_client, admin_csrf, monkeypatch, no_devices
+):
+    client = admin_client
 
     start_evt = threading.Event()
     finish_evt = threading.Event()
@@ -224,9 +142,7 @@ def test_analysis_status_reports_equipment(make_app, monkeypatch):
 
     monkeypatch.setattr(zone, "process_equipment", fake_process)
 
-    monkeypatch.setattr(zone, "fetch_devices", lambda: [])
-    token = get_csrf(client, "/admin/equipment")
-    resp = client.post("/reanalyze_all", data={"csrf_token": token})
+    resp = client.post("/reanalyze_all", data={"csrf_token": admin_csrf})
     assert resp.status_code == 302
 
     assert start_evt.wait(1)
@@ -1,13 +1,5 @@
-import os
-import sys
-
-ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
-if ROOT_DIR not in sys.path:
-    sys.path.insert(0, ROOT_DIR)
-
-from models import db, User  # noqa: E402
-from tests.utils import login, get_csrf  # noqa: E402
-import zone  # noqa: E402
+from models import db, User
+from tests.utils import get_csrf
 
 
 def test_login_shows_field_errors(make_app):
@@ -27,18 +19,14 @@ def test_login_shows_field_errors(make_app):
     assert "Mot de passe requis" in html
 
 
-def test_admin_invalid_url_validation(make_app, monkeypatch):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-    monkeypatch.setattr(zone, "fetch_devices", lambda: [])
-    token = get_csrf(client, "/admin/traccar")
+def test_admin_invalid_url_validation(admin_client, admin_csrf, no_devices):
+    client = admin_client
     resp = client.post(
         "/admin/traccar",
         data={
             "base_url": "not a url",
             "token_global": "tok",
-            "csrf_token": token,
+            "csrf_token": admin_csrf,
         },
     )
     html = resp.get_data(as_text=True)
@@ -46,11 +34,8 @@ def test_admin_invalid_url_validation(make_app, monkeypatch):
     assert "URL invalide" in html
 
 
-def test_users_add_validation_errors(make_app):
-    app = make_app()
-    client = app.test_client()
-    login(client)
-    token = get_csrf(client, "/users")
+def test_users_add_validation_errors(admin_client, admin_csrf):
+    client = admin_client
     resp = client.post(
         "/users",
         data={
@@ -58,7 +43,7 @@ def test_users_add_validation_errors(make_app):
             "username": "ab",
             "password": "",
             "role": "read",
-            "csrf_token": token,
+            "csrf_token": admin_csrf,
         },
     )
     html = resp.get_data(as_text=True)
@@ -69,24 +54,22 @@ def test_users_add_validation_errors(make_app):
     )
 
 
-def test_users_reset_validation_error(make_app):
-    app = make_app()
+def test_users_reset_validation_error(admin_client, admin_csrf):
+    app = admin_client.application
     with app.app_context():
         u = User(username="u1", is_admin=False)
         u.set_password("old")
         db.session.add(u)
         db.session.commit()
         uid = u.id
-    client = app.test_client()
-    login(client)
-    token = get_csrf(client, "/users")
+    client = admin_client
     resp = client.post(
         "/users",
         data={
             "action": "reset",
             "user_id": str(uid),
             "password": "",
-            "csrf_token": token,
+            "csrf_token": admin_csrf,
         },
     )
     html = resp.get_data(as_text=True)
@@ -1,20 +1,10 @@
-import os
-import sys
 import types
 from datetime import datetime, date as dt_date, timezone
 
 import pytest
 from shapely.geometry import Polygon, Point, LineString
 
-# S'assurer que le dossier racine est dans sys.path pour l'import de zone
-ROOT_DIR = os.path.dirname(os.path.dirname(__file__))
-if ROOT_DIR not in sys.path:
-    sys.path.insert(0, ROOT_DIR)
-
-import zone  # noqa: E402
-
-os.environ.setdefault("TRACCAR_AUTH_TOKEN", "dummy")
-os.environ.setdefault("TRACCAR_BASE_URL", "http://example.com")
+import zone
 
 
 class DummyResponse:
@@ -222,7 +212,9 @@ def test_geojson_features_contain_dates():
 
 # ---------- Helpers for DB ----------
 
-def setup_db():
+@pytest.fixture(scope="module")
+def db_app():
+    """Bare Flask app bound to ``zone.db``, with its schema created once."""
     from flask import Flask
     app = Flask(__name__)
     app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///:memory:"
@@ -230,370 +222,367 @@ def setup_db():
     zone.db.init_app(app)
     with app.app_context():
         zone.db.create_all()
-        yield app
+    return app
 
 
-# ---------- process_equipment ----------
+@pytest.fixture
+def setup_db(db_app):
+    """Push an app context on ``db_app`` with every table emptied."""
+    db_app.extensions.pop("agg_cache", None)
+    with db_app.app_context():
+        for table in reversed(zone.db.metadata.sorted_tables):
+            zone.db.session.execute(table.delete())
+        zone.db.session.commit()
+        yield db_app
 
-def test_process_equipment(monkeypatch):
-    for app in setup_db():
-        with app.app_context():
-            eq = zone.Equipment(id_traccar=1, name="eq1")
-            zone.db.session.add(eq)
-            zone.db.session.commit()
 
-            positions = [
-                {
-                    "latitude": 0,
-                    "longitude": 0,
-                    "deviceTime": "2023-01-01T00:00:00Z",
-                },
-                {
-                    "latitude": 0,
-                    "longitude": 0,
-                    "deviceTime": "2023-01-01T00:01:00Z",
-                },
-                {
-                    "latitude": 0,
-                    "longitude": 0,
-                    "deviceTime": "2023-01-01T00:02:00Z",
-                },
-            ]
-
-            monkeypatch.setattr(
-                zone,
-                "fetch_positions",
-                lambda *a, **k: positions,
-            )
-            monkeypatch.setattr(
-                zone,
-                "cluster_positions",
-                lambda pos: (
-                    [
-                        {
-                            "geometry": Polygon(
-                                [(0, 0), (1, 0), (1, 1), (0, 1)]
-                            ),
-                            "dates": ["2023-01-01"],
-                        }
-                    ],
-                    {},
-                ),
-            )
-            monkeypatch.setattr(
-                zone,
-                "aggregate_overlapping_zones",
-                lambda z: z,
-            )
-
-            zone.process_equipment(eq)
-
-            dz = zone.DailyZone.query.filter_by(equipment_id=eq.id).first()
-            assert dz is not None
-            assert dz.surface_ha > 0
-            assert eq.total_hectares == dz.surface_ha
-
-
-def test_process_equipment_creates_tracks(monkeypatch):
-    for app in setup_db():
-        with app.app_context():
-            eq = zone.Equipment(id_traccar=1, name="eq1")
-            zone.db.session.add(eq)
-            zone.db.session.commit()
-
-            positions = [
-                {
-                    "latitude": 0,
-                    "longitude": 0,
-                    "deviceTime": "2023-01-01T00:00:00Z",
-                },
-                {
-                    "latitude": 0.001,
-                    "longitude": 0.001,
-                    "deviceTime": "2023-01-01T00:10:00Z",
-                },
-            ]
-
-            monkeypatch.setattr(
-                zone,
-                "fetch_positions",
-                lambda *a, **k: positions,
-            )
+# ---------- process_equipment ----------
 
-            from datetime import datetime as dt
+def test_process_equipment(monkeypatch, setup_db):
+    eq = zone.Equipment(id_traccar=1, name="eq1")
+    zone.db.session.add(eq)
+    zone.db.session.commit()
+
+    positions = [
+        {
+            "latitude": 0,
+            "longitude": 0,
+            "deviceTime": "2023-01-01T00:00:00Z",
+        },
+        {
+            "latitude": 0,
+            "longitude": 0,
+            "deviceTime": "2023-01-01T00:01:00Z",
+        },
+        {
+            "latitude": 0,
+            "longitude": 0,
+            "deviceTime": "2023-01-01T00:02:00Z",
+        },
+    ]
 
-            def fake_cluster(pos):
-                return [], {
-                    "2023-01-01": [
-                        (0, 0, dt(2023, 1, 1, 0, 0, 0)),
-                        (0.001, 0.001, dt(2023, 1, 1, 0, 10, 0)),
-                    ]
+    monkeypatch.setattr(
+        zone,
+        "fetch_positions",
+        lambda *a, **k: positions,
+    )
+    monkeypatch.setattr(
+        zone,
+        "cluster_positions",
+        lambda pos: (
+            [
+                {
+                    "geometry": Polygon(
+                        [(0, 0), (1, 0), (1, 1), (0, 1)]
+                    ),
+                    "dates": ["2023-01-01"],
                 }
+            ],
+            {},
+        ),
+    )
+    monkeypatch.setattr(
+        zone,
+        "aggregate_overlapping_zones",
+        lambda z: z,
+    )
+
+    zone.process_equipment(eq)
+
+    dz = zone.DailyZone.query.filter_by(equipment_id=eq.id).first()
+    assert dz is not None
+    assert dz.surface_ha > 0
+    assert eq.total_hectares == dz.surface_ha
+
+
+def test_process_equipment_creates_tracks(monkeypatch, setup_db):
+    eq = zone.Equipment(id_traccar=1, name="eq1")
+    zone.db.session.add(eq)
+    zone.db.session.commit()
+
+    positions = [
+        {
+            "latitude": 0,
+            "longitude": 0,
+            "deviceTime": "2023-01-01T00:00:00Z",
+        },
+        {
+            "latitude": 0.001,
+            "longitude": 0.001,
+            "deviceTime": "2023-01-01T00:10:00Z",
+        },
+    ]
 
-            monkeypatch.setattr(zone, "cluster_positions", fake_cluster)
-            monkeypatch.setattr(
-                zone, "aggregate_overlapping_zones", lambda z: z
-            )
+    monkeypatch.setattr(
+        zone,
+        "fetch_positions",
+        lambda *a, **k: positions,
+    )
 
-            zone.process_equipment(eq)
+    from datetime import datetime as dt
 
-            assert zone.Track.query.count() == 1
-            track = zone.Track.query.first()
-            assert track and track.line_wkt.startswith("LINESTRING")
-            positions_db = zone.Position.query.filter_by(
-                equipment_id=eq.id
-            ).all()
-            assert all(p.track_id == track.id for p in positions_db)
+    def fake_cluster(pos):
+        return [], {
+            "2023-01-01": [
+                (0, 0, dt(2023, 1, 1, 0, 0, 0)),
+                (0.001, 0.001, dt(2023, 1, 1, 0, 10, 0)),
+            ]
+        }
+
+    monkeypatch.setattr(zone, "cluster_positions", fake_cluster)
+    monkeypatch.setattr(
+        zone, "aggregate_overlapping_zones", lambda z: z
+    )
+
+    zone.process_equipment(eq)
+
+    assert zone.Track.query.count() == 1
+    track = zone.Track.query.first()
+    assert track and track.line_wkt.startswith("LINESTRING")
+    positions_db = zone.Position.query.filter_by(
+        equipment_id=eq.id
+    ).all()
+    assert all(p.track_id == track.id for p in positions_db)
+
+
+def test_track_includes_zone_endpoints(monkeypatch, setup_db):
+    eq = zone.Equipment(id_traccar=1, name="eq1")
+    zone.db.session.add(eq)
+    zone.db.session.commit()
+
+    positions = [
+        {
+            "latitude": 0,
+            "longitude": 0,
+            "deviceTime": "2023-01-01T00:00:00Z",
+        },
+        {
+            "latitude": 0.0005,
+            "longitude": 0.0005,
+            "deviceTime": "2023-01-01T00:05:00Z",
+        },
+        {
+            "latitude": 0.001,
+            "longitude": 0.001,
+            "deviceTime": "2023-01-01T00:10:00Z",
+        },
+    ]
 
+    monkeypatch.setattr(
+        zone,
+        "fetch_positions",
+        lambda *a, **k: positions,
+    )
 
-def test_track_includes_zone_endpoints(monkeypatch):
-    for app in setup_db():
-        with app.app_context():
-            eq = zone.Equipment(id_traccar=1, name="eq1")
-            zone.db.session.add(eq)
-            zone.db.session.commit()
+    from datetime import datetime as dt
 
-            positions = [
-                {
-                    "latitude": 0,
-                    "longitude": 0,
-                    "deviceTime": "2023-01-01T00:00:00Z",
-                },
-                {
-                    "latitude": 0.0005,
-                    "longitude": 0.0005,
-                    "deviceTime": "2023-01-01T00:05:00Z",
-                },
-                {
-                    "latitude": 0.001,
-                    "longitude": 0.001,
-                    "deviceTime": "2023-01-01T00:10:00Z",
-                },
+    def fake_cluster(pos):
+        return [], {
+            "2023-01-01": [
+                (0.0005, 0.0005, dt(2023, 1, 1, 0, 5)),
             ]
+        }
 
-            monkeypatch.setattr(
-                zone,
-                "fetch_positions",
-                lambda *a, **k: positions,
-            )
+    monkeypatch.setattr(zone, "cluster_positions", fake_cluster)
+    monkeypatch.setattr(
+        zone, "aggregate_overlapping_zones", lambda z: z
+    )
 
-            from datetime import datetime as dt
+    zone.process_equipment(eq)
 
-            def fake_cluster(pos):
-                return [], {
-                    "2023-01-01": [
-                        (0.0005, 0.0005, dt(2023, 1, 1, 0, 5)),
-                    ]
-                }
+    track = zone.Track.query.first()
+    from shapely import wkt
 
-            monkeypatch.setattr(zone, "cluster_positions", fake_cluster)
-            monkeypatch.setattr(
-                zone, "aggregate_overlapping_zones", lambda z: z
-            )
+    coords = list(wkt.loads(track.line_wkt).coords)
+    assert coords[0] == (0.0, 0.0)
+    assert coords[1] == (0.0005, 0.0005)
+    assert coords[-1] == (0.001, 0.001)
 
-            zone.process_equipment(eq)
 
-            track = zone.Track.query.first()
-            from shapely import wkt
+# ---------- track boundary clipping ----------
 
-            coords = list(wkt.loads(track.line_wkt).coords)
-            assert coords[0] == (0.0, 0.0)
-            assert coords[1] == (0.0005, 0.0005)
-            assert coords[-1] == (0.001, 0.001)
+def test_track_clipped_to_zone_boundaries(monkeypatch, setup_db):
+    eq = zone.Equipment(id_traccar=1, name="eq1")
+    zone.db.session.add(eq)
+    zone.db.session.commit()
+
+    positions = [
+        {
+            "latitude": 0,
+            "longitude": 0,
+            "deviceTime": "2023-01-01T00:00:00Z",
+        },
+        {
+            "latitude": 0.0003,
+            "longitude": 0.0003,
+            "deviceTime": "2023-01-01T00:05:00Z",
+        },
+        {
+            "latitude": 0.0007,
+            "longitude": 0.0007,
+            "deviceTime": "2023-01-01T00:07:00Z",
+        },
+        {
+            "latitude": 0.001,
+            "longitude": 0.001,
+            "deviceTime": "2023-01-01T00:10:00Z",
+        },
+    ]
 
+    monkeypatch.setattr(
+        zone, "fetch_positions", lambda *a, **k: positions
+    )
 
-# ---------- track boundary clipping ----------
+    from datetime import datetime as dt
 
-def test_track_clipped_to_zone_boundaries(monkeypatch):
-    for app in setup_db():
-        with app.app_context():
-            eq = zone.Equipment(id_traccar=1, name="eq1")
-            zone.db.session.add(eq)
-            zone.db.session.commit()
+    zone1 = Point(0, 0).buffer(0.0002)
+    zone2 = Point(0.001, 0.001).buffer(0.0002)
 
-            positions = [
-                {
-                    "latitude": 0,
-                    "longitude": 0,
-                    "deviceTime": "2023-01-01T00:00:00Z",
-                },
-                {
-                    "latitude": 0.0003,
-                    "longitude": 0.0003,
-                    "deviceTime": "2023-01-01T00:05:00Z",
-                },
-                {
-                    "latitude": 0.0007,
-                    "longitude": 0.0007,
-                    "deviceTime": "2023-01-01T00:07:00Z",
-                },
-                {
-                    "latitude": 0.001,
-                    "longitude": 0.001,
-                    "deviceTime": "2023-01-01T00:10:00Z",
-                },
-            ]
-
-            monkeypatch.setattr(
-                zone, "fetch_positions", lambda *a, **k: positions
-            )
-
-            from datetime import datetime as dt
-
-            zone1 = Point(0, 0).buffer(0.0002)
-            zone2 = Point(0.001, 0.001).buffer(0.0002)
-
-            def fake_cluster(pos):
-                return (
-                    [
-                        {"geometry": zone1, "dates": ["2023-01-01"]},
-                        {"geometry": zone2, "dates": ["2023-01-01"]},
-                    ],
-                    {
-                        "2023-01-01": [
-                            (0.0003, 0.0003, dt(2023, 1, 1, 0, 5)),
-                            (0.0007, 0.0007, dt(2023, 1, 1, 0, 7)),
-                        ]
-                    },
-                )
+    def fake_cluster(pos):
+        return (
+            [
+                {"geometry": zone1, "dates": ["2023-01-01"]},
+                {"geometry": zone2, "dates": ["2023-01-01"]},
+            ],
+            {
+                "2023-01-01": [
+                    (0.0003, 0.0003, dt(2023, 1, 1, 0, 5)),
+                    (0.0007, 0.0007, dt(2023, 1, 1, 0, 7)),
+                ]
+            },
+        )
 
-            monkeypatch.setattr(zone, "cluster_positions", fake_cluster)
-            monkeypatch.setattr(
-                zone, "aggregate_overlapping_zones", lambda z: z
-            )
+    monkeypatch.setattr(zone, "cluster_positions", fake_cluster)
+    monkeypatch.setattr(
+        zone, "aggregate_overlapping_zones", lambda z: z
+    )
 
-            zone.process_equipment(eq)
+    zone.process_equipment(eq)
 
-            track = zone.Track.query.first()
-            from shapely import wkt
+    track = zone.Track.query.first()
+    from shapely import wkt
 
-            coords = list(wkt.loads(track.line_wkt).coords)
-            assert len(coords) == 4
+    coords = list(wkt.loads(track.line_wkt).coords)
+    assert len(coords) == 4
 
-            start_expected = LineString([
-                (0, 0),
-                (0.0003, 0.0003),
-            ]).intersection(zone1.exterior)
-            end_expected = LineString([
-                (0.001, 0.001),
-                (0.0007, 0.0007),
-            ]).intersection(zone2.exterior)
+    start_expected = LineString([
+        (0, 0),
+        (0.0003, 0.0003),
+    ]).intersection(zone1.exterior)
+    end_expected = LineString([
+        (0.001, 0.001),
+        (0.0007, 0.0007),
+    ]).intersection(zone2.exterior)
 
-            assert coords[0][0] == pytest.approx(start_expected.x)
-            assert coords[0][1] == pytest.approx(start_expected.y)
-            assert coords[-1][0] == pytest.approx(end_expected.x)
-            assert coords[-1][1] == pytest.approx(end_expected.y)
+    assert coords[0][0] == pytest.approx(start_expected.x)
+    assert coords[0][1] == pytest.approx(start_expected.y)
+    assert coords[-1][0] == pytest.approx(end_expected.x)
+    assert coords[-1][1] == pytest.approx(end_expected.y)
 
 
 # ---------- recalculate_hectares_from_positions ----------
 
-def test_recalculate_hectares_from_positions(monkeypatch):
-    for app in setup_db():
-        with app.app_context():
-            eq = zone.Equipment(id_traccar=1, name="eq1")
-            zone.db.session.add(eq)
-            zone.db.session.commit()
-
-            zone.db.session.add(
-                zone.Position(
-                    equipment_id=eq.id,
-                    latitude=0,
-                    longitude=0,
-                    timestamp=datetime(2023, 1, 1),
-                )
-            )
-            zone.db.session.add(
-                zone.Position(
-                    equipment_id=eq.id,
-                    latitude=0,
-                    longitude=0,
-                    timestamp=datetime(2023, 1, 1, 0, 1),
-                )
-            )
-            zone.db.session.add(
-                zone.Position(
-                    equipment_id=eq.id,
-                    latitude=0,
-                    longitude=0,
-                    timestamp=datetime(2023, 1, 1, 0, 2),
-                )
-            )
-            zone.db.session.commit()
-
-            monkeypatch.setattr(
-                zone,
-                "cluster_positions",
-                lambda pos: (
-                    [
-                        {
-                            "geometry": Polygon(
-                                [(0, 0), (1, 0), (1, 1), (0, 1)]
-                            ),
-                            "dates": ["2023-01-01"],
-                        }
-                    ],
-                    {},
-                ),
-            )
-            monkeypatch.setattr(
-                zone,
-                "aggregate_overlapping_zones",
-                lambda z: z,
-            )
-
-            total = zone.recalculate_hectares_from_positions(eq.id)
-            assert total > 0
-            assert eq.total_hectares == total
-
-
-def test_calculate_relative_hectares():
-    for app in setup_db():
-        with app.app_context():
-            eq = zone.Equipment(id_traccar=1, name="eq1")
-            zone.db.session.add(eq)
-            zone.db.session.commit()
-
-            poly = Polygon([(0, 0), (100, 0), (100, 100), (0, 100)])
-            zone.db.session.add(
-                zone.DailyZone(
-                    equipment_id=eq.id,
-                    date=datetime(2023, 1, 1).date(),
-                    surface_ha=1.0,
-                    polygon_wkt=poly.wkt,
-                )
-            )
-            zone.db.session.add(
-                zone.DailyZone(
-                    equipment_id=eq.id,
-                    date=datetime(2023, 1, 2).date(),
-                    surface_ha=1.0,
-                    polygon_wkt=poly.wkt,
-                )
-            )
-            zone.db.session.commit()
-
-            total = zone.calculate_relative_hectares(eq.id)
-            assert abs(total - 1.0) < 1e-6
+def test_recalculate_hectares_from_positions(monkeypatch, setup_db):
+    eq = zone.Equipment(id_traccar=1, name="eq1")
+    zone.db.session.add(eq)
+    zone.db.session.commit()
+
+    zone.db.session.add(
+        zone.Position(
+            equipment_id=eq.id,
+            latitude=0,
+            longitude=0,
+            timestamp=datetime(2023, 1, 1),
+        )
+    )
+    zone.db.session.add(
+        zone.Position(
+            equipment_id=eq.id,
+            latitude=0,
+            longitude=0,
+            timestamp=datetime(2023, 1, 1, 0, 1),
+        )
+    )
+    zone.db.session.add(
+        zone.Position(
+            equipment_id=eq.id,
+            latitude=0,
+            longitude=0,
+            timestamp=datetime(2023, 1, 1, 0, 2),
+        )
+    )
+    zone.db.session.commit()
+
+    monkeypatch.setattr(
+        zone,
+        "cluster_positions",
+        lambda pos: (
+            [
+                {
+                    "geometry": Polygon(
+                        [(0, 0), (1, 0), (1, 1), (0, 1)]
+                    ),
+                    "dates": ["2023-01-01"],
+                }
+            ],
+            {},
+        ),
+    )
+    monkeypatch.setattr(
+        zone,
+        "aggregate_overlapping_zones",
+        lambda z: z,
+    )
+
+    total = zone.recalculate_hectares_from_positions(eq.id)
+    assert total > 0
+    assert eq.total_hectares == total
+
+
+def test_calculate_relative_hectares(setup_db):
+    eq = zone.Equipment(id_traccar=1, name="eq1")
+    zone.db.session.add(eq)
+    zone.db.session.commit()
+
+    poly = Polygon([(0, 0), (100, 0), (100, 100), (0, 100)])
+    zone.db.session.add(
+        zone.DailyZone(
+            equipment_id=eq.id,
+            date=datetime(2023, 1, 1).date(),
+            surface_ha=1.0,
+            polygon_wkt=poly.wkt,
+        )
+    )
+    zone.db.session.add(
+        zone.DailyZone(
+            equipment_id=eq.id,
+            date=datetime(2023, 1, 2).date(),
+            surface_ha=1.0,
+            polygon_wkt=poly.wkt,
+        )
+    )
+    zone.db.session.commit()
+
+    total = zone.calculate_relative_hectares(eq.id)
+    assert abs(total - 1.0) < 1e-6
 
 
 # ---------- analyse_quotidienne & analyser_equipement ----------
 
-def test_analyse_quotidienne(monkeypatch):
-    for app in setup_db():
-        with app.app_context():
-            eq1 = zone.Equipment(id_traccar=1, name="a")
-            eq2 = zone.Equipment(id_traccar=2, name="b")
-            zone.db.session.add_all([eq1, eq2])
-            zone.db.session.commit()
+def test_analyse_quotidienne(monkeypatch, setup_db):
+    eq1 = zone.Equipment(id_traccar=1, name="a")
+    eq2 = zone.Equipment(id_traccar=2, name="b")
+    zone.db.session.add_all([eq1, eq2])
+    zone.db.session.commit()
 
-            called = []
+    called = []
 
-            def fake_process(e):
-                called.append(e.id_traccar)
-            monkeypatch.setattr(zone, "process_equipment", fake_process)
+    def fake_process(e):
+        called.append(e.id_traccar)
+    monkeypatch.setattr(zone, "process_equipment", fake_process)
 
-            zone.analyse_quotidienne()
-            assert set(called) == {1, 2}
+    zone.analyse_quotidienne()
+    assert set(called) == {1, 2}
 
 
 def test_analyser_equipement(monkeypatch):
@@ -608,89 +597,85 @@ def test_analyser_equipement(monkeypatch):
     assert called == {"id": 5, "since": 42}
 
 
-def test_distance_between_zones_calculation(monkeypatch):
-    for app in setup_db():
-        with app.app_context():
-            eq = zone.Equipment(id_traccar=1, name="eq1")
-            zone.db.session.add(eq)
-            zone.db.session.commit()
-
-            monkeypatch.setattr(
-                zone,
-                "fetch_positions",
-                lambda *a, **k: [],
-            )
-
-            def fake_cluster(pos):
-                return (
-                    [
-                        {
-                            "geometry": Polygon(
-                                [
-                                    (0, 0),
-                                    (100, 0),
-                                    (100, 100),
-                                    (0, 100),
-                                ]
-                            ),
-                            "dates": ["2023-01-01"],
-                        },
-                        {
-                            "geometry": Polygon(
-                                [
-                                    (1000, 0),
-                                    (1100, 0),
-                                    (1100, 100),
-                                    (1000, 100),
-                                ]
-                            ),
-                            "dates": ["2023-01-02"],
-                        },
-                    ],
-                    {},
-                )
-
-            monkeypatch.setattr(
-                zone,
-                "cluster_positions",
-                fake_cluster,
-            )
-            monkeypatch.setattr(
-                zone,
-                "aggregate_overlapping_zones",
-                lambda z: z,
-            )
-
-            zone.process_equipment(eq)
-
-            assert eq.distance_between_zones > 0
-
-
-def test_zones_split_by_pass_count(monkeypatch):
-    for app in setup_db():
-        with app.app_context():
-            eq = zone.Equipment(id_traccar=1, name="eq1")
-            zone.db.session.add(eq)
-            zone.db.session.commit()
-
-            poly1 = Polygon([(0, 0), (1, 0), (1, 1), (0, 1)])
-            poly2 = Polygon([(0.5, 0.5), (1.5, 0.5), (1.5, 1.5), (0.5, 1.5)])
-
-            monkeypatch.setattr(zone, "fetch_positions", lambda *a, **k: [])
-            monkeypatch.setattr(
-                zone,
-                "cluster_positions",
-                lambda pos: (
-                    [
-                        {"geometry": poly1, "dates": ["2023-01-01"]},
-                        {"geometry": poly2, "dates": ["2023-01-01"]},
-                    ],
-                    {},
-                ),
-            )
-
-            zone.process_equipment(eq, since=datetime(2023, 1, 1))
-
-            zones = zone.DailyZone.query.filter_by(equipment_id=eq.id).all()
-            counts = sorted(z.pass_count for z in zones)
-            assert counts == [1, 1, 2]
+def test_distance_between_zones_calculation(monkeypatch, setup_db):
+    eq = zone.Equipment(id_traccar=1, name="eq1")
+    zone.db.session.add(eq)
+    zone.db.session.commit()
+
+    monkeypatch.setattr(
+        zone,
+        "fetch_positions",
+        lambda *a, **k: [],
+    )
+
+    def fake_cluster(pos):
+        return (
+            [
+                {
+                    "geometry": Polygon(
+                        [
+                            (0, 0),
+                            (100, 0),
+                            (100, 100),
+                            (0, 100),
+                        ]
+                    ),
+                    "dates": ["2023-01-01"],
+                },
+                {
+                    "geometry": Polygon(
+                        [
+                            (1000, 0),
+                            (1100, 0),
+                            (1100, 100),
+                            (1000, 100),
+                        ]
+                    ),
+                    "dates": ["2023-01-02"],
+                },
+            ],
+            {},
+        )
+
+    monkeypatch.setattr(
+        zone,
+        "cluster_positions",
+        fake_cluster,
+    )
+    monkeypatch.setattr(
+        zone,
+        "aggregate_overlapping_zones",
+        lambda z: z,
+    )
+
+    zone.process_equipment(eq)
+
+    assert eq.distance_between_zones > 0
+
+
+def test_zones_split_by_pass_count(monkeypatch, setup_db):
+    eq = zone.Equipment(id_traccar=1, name="eq1")
+    zone.db.session.add(eq)
+    zone.db.session.commit()
+
+    poly1 = Polygon([(0, 0), (1, 0), (1, 1), (0, 1)])
+    poly2 = Polygon([(0.5, 0.5), (1.5, 0.5), (1.5, 1.5), (0.5, 1.5)])
+
+    monkeypatch.setattr(zone, "fetch_positions", lambda *a, **k: [])
+    monkeypatch.setattr(
+        zone,
+        "cluster_positions",
+        lambda pos: (
+            [
+                {"geometry": poly1, "dates": ["2023-01-01"]},
+                {"geometry": poly2, "dates": ["2023-01-01"]},
+            ],
+            {},
+        ),
+    )
+
+    zone.process_equipment(eq, since=datetime(2023, 1, 1))
+
+    zones = zone.DailyZone.query.filter_by(equipment_id=eq.id).all()
+    counts = sorted(z.pass_count for z in zones)
+    assert counts == [1, 1, 2]
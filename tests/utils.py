@@ -1,15 +1,125 @@
+import json
 import re
+import sqlite3
+from functools import lru_cache
+from typing import AnyStr, Iterable, Optional
+
+from sqlalchemy import insert, text
+
+from app import create_app
+from models import db, User, Config, Equipment, Position
+
+
+def seed_defaults() -> int:
+    """Insert the admin user, Traccar config and equipment used by tests.
+
+    Must be called inside an application context. Returns the id of the
+    seeded equipment.
+    """
+    admin = User(username="admin", is_admin=True)
+    admin.set_password("pass")
+    db.session.add(admin)
+    db.session.add(
+        Config(traccar_url="http://example.com", traccar_token="dummy")
+    )
+    eq = Equipment(id_traccar=1, name="eq")
+    db.session.add(eq)
+    db.session.commit()
+    return eq.id
+
+
+def clear_tables(*models) -> None:
+    """Empty the tables of ``models`` with plain ``DELETE`` statements.
+
+    Unlike ``Query.delete()`` this skips the ORM session synchronisation.
+    The caller commits.
+    """
+    for model in models:
+        db.session.execute(model.__table__.delete())
+
+
+def seed_positions(equipment_id: int, rows) -> None:
+    """Insert ``(latitude, longitude, timestamp)`` rows in one statement.
+
+    The caller commits.
+    """
+    db.session.execute(
+        insert(Position),
+        [
+            {
+                "equipment_id": equipment_id,
+                "latitude": lat,
+                "longitude": lon,
+                "timestamp": ts,
+            }
+            for lat, lon, ts in rows
+        ],
+    )
+
+
+def make_legacy_db(path, *statements: str) -> None:
+    """Create the SQLite file ``path`` from ``statements``.
+
+    Reproduces databases written by older versions of the app. The
+    statements run in a single transaction without fsyncs.
+    """
+    conn = sqlite3.connect(path)
+    try:
+        conn.executescript(
+            "PRAGMA synchronous=OFF;\nPRAGMA journal_mode=MEMORY;\nBEGIN;\n"
+            + ";\n".join(statements)
+            + ";\nCOMMIT;"
+        )
+    finally:
+        conn.close()
+
+
+def make_legacy_app(*statements: str):
+    """Return an app whose in-memory database holds ``statements``.
+
+    Like :func:`make_legacy_db` without touching the disk: the tables are
+    created on the app's own engine before its first request runs
+    ``upgrade_db()``.
+    """
+    app = create_app(
+        start_scheduler=False,
+        run_initial_analysis=False,
+        config={"SQLALCHEMY_DATABASE_URI": "sqlite:///:memory:"},
+    )
+    with app.app_context(), db.engine.begin() as conn:
+        for statement in statements:
+            conn.exec_driver_sql(statement)
+    return app
+
+
+_CSRF_RE = re.compile(r'name="csrf_token" value="([^"]+)"')
+_CSRF_BYTES_RE = re.compile(_CSRF_RE.pattern.encode())
+
+
+def column_names(table: str) -> set[str]:
+    """Return the column names of ``table``, empty when it does not exist.
+
+    Reads ``PRAGMA table_info`` directly instead of reflecting full column
+    metadata with an Inspector. Must be called inside an application
+    context.
+    """
+    rows = db.session.execute(
+        text(f'PRAGMA table_info("{table}")')
+    ).all()
+    return {row[1] for row in rows}
 
 
 def extract_csrf_token(html: str) -> str:
-    match = re.search(r'name="csrf_token" value="([^"]+)"', html)
+    match = _CSRF_RE.search(html)
     assert match, "CSRF token not found"
     return match.group(1)
 
 
 def get_csrf(client, url: str) -> str:
     resp = client.get(url)
-    return extract_csrf_token(resp.get_data(as_text=True))
+    match = _CSRF_BYTES_RE.search(resp.data)
+    assert match, "CSRF token not found"
+    return match.group(1).decode()
 
 
 def login(client, username: str = "admin", password: str = "pass"):
@@ -18,3 +128,74 @@ def login(client, username: str = "admin", password: str = "pass"):
         "/login",
         data={"username": username, "password": password, "csrf_token": token},
     )
+
+
+def login_as(client, username: str = "admin") -> None:
+    """Log ``client`` in as ``username`` without going through the form.
+
+    Writes the Flask-Login user id straight into the session, saving the
+    GET and POST round-trips of :func:`login`. Use :func:`login` when the
+    login view itself is under test.
+    """
+    with client.application.app_context():
+        user_id = db.session.execute(
+            db.select(User.id).filter_by(username=username)
+        ).scalar_one()
+    with client.session_transaction() as sess:
+        sess["_user_id"] = str(user_id)
+        sess["_fresh"] = True
+
+
+@lru_cache(maxsize=None)
+def _needles_pattern(needles: tuple[AnyStr, ...]) -> "re.Pattern[AnyStr]":
+    # Longest first so a needle is not shadowed by one of its prefixes
+    ordered = sorted(needles, key=len, reverse=True)
+    sep = b"|" if isinstance(ordered[0], bytes) else "|"
+    return re.compile(sep.join(map(re.escape, ordered)))
+
+
+@lru_cache(maxsize=None)
+def _js_array_pattern(var_name: str) -> "re.Pattern[bytes]":
+    return re.compile(
+        rf"const {re.escape(var_name)}\s*=\s*(\[.*?\]);".encode()
+    )
+
+
+def get_js_array(body: bytes, var_name: str):
+    """Return the JSON array assigned to ``const var_name`` in ``body``.
+
+    Scans the raw response bytes so callers need not decode the page.
+    """
+    match = _js_array_pattern(var_name).search(body)
+    assert match, f"{var_name} not found"
+    return json.loads(match.group(1))
+
+
+def assert_all_in(haystack: AnyStr, needles: Iterable[AnyStr]) -> None:
+    """Assert that every needle occurs in ``haystack``.
+
+    The needles are matched with a single compiled alternation so the
+    haystack is scanned once instead of once per ``assert needle in ...``.
+    Needles hidden by an overlapping match are re-checked individually.
+    ``haystack`` may be a response body as ``bytes`` when the needles are
+    bytes too.
+    """
+    needles = tuple(needles)
+    if not needles:
+        return
+    found = set(_needles_pattern(needles).findall(haystack))
+    missing = [n for n in needles if n not in found and n not in haystack]
+    assert not missing, f"missing from output: {missing}"
+
+
+def slice_between(text: str, start: str, end: Optional[str] = None) -> str:
+    """Return ``text`` from ``start`` up to the next ``end`` marker.
+
+    Fails immediately when ``start`` is missing instead of silently slicing
+    from index ``-1``. Without ``end``, or when it does not follow
+    ``start``, the slice runs to the end of ``text``.
+    """
+    i = text.find(start)
+    assert i != -1, f"{start!r} not found"
+    j = text.find(end, i) if end is not None else -1
+    return text[i:j] if j != -1 else text[i:]
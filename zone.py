@@ -15,6 +15,7 @@ from shapely.geometry import (
 from shapely.ops import transform as shp_transform
 import pyproj
 import alphashape
+from flask import current_app, has_app_context
 # Ensure joblib uses a writable temp folder to avoid warnings in CI
 os.environ.setdefault("JOBLIB_TEMP_FOLDER", "/tmp")
 from sklearn.cluster import DBSCAN
@@ -95,18 +96,27 @@ _to_webmerc = pyproj.Transformer.from_crs(
     always_xy=True,
 ).transform
 
-# Cache pour les zones agrégées
+# Cache pour les zones agrégées, propre à chaque application
 # Clé: (equipment_id, start_date, end_date)
-_AGG_CACHE: Dict[
-    Tuple[int, Optional[dt_date], Optional[dt_date]], List[dict]
-] = {}
+_AggCache = Dict[Tuple[int, Optional[dt_date], Optional[dt_date]], List[dict]]
+
+
+def _agg_cache() -> _AggCache:
+    """Retourne le cache des zones agrégées de l'application courante."""
+    return current_app.extensions.setdefault("agg_cache", {})
 
 
 def invalidate_cache(equipment_id: int) -> None:
-    """Supprime les zones agrégées en cache pour l'équipement."""
-    keys = [k for k in _AGG_CACHE if k[0] == equipment_id]
+    """Supprime les zones agrégées en cache pour l'équipement.
+
+    Sans contexte d'application il n'y a aucun cache à vider.
+    """
+    if not has_app_context():
+        return
+    cache = _agg_cache()
+    keys = [k for k in cache if k[0] == equipment_id]
     for k in keys:
-        _AGG_CACHE.pop(k, None)
+        cache.pop(k, None)
 
 
 def geom_bounds(geom):
@@ -165,8 +175,9 @@ def get_aggregated_zones(
         year=year, month=month, day=day, start=start, end=end
     )
 
+    cache = _agg_cache()
     key = (equipment_id, start_date, end_date)
-    if key not in _AGG_CACHE:
+    if key not in cache:
         from shapely import wkt
 
         query = DailyZone.query.filter_by(equipment_id=equipment_id)
@@ -185,8 +196,8 @@ def get_aggregated_zones(
             for z in zones
             if z.polygon_wkt
         ]
-        _AGG_CACHE[key] = aggregate_overlapping_zones(daily)
-    return _AGG_CACHE[key]
+        cache[key] = aggregate_overlapping_zones(daily)
+    return cache[key]
 
 
 def get_bounds_for_equipment(